@@ -4,9 +4,9 @@ from .models import ContentVisit
 
 
 class ContentVisitAdmin(admin.ModelAdmin):
-    list_display = ('id', 'content_type__model', 'object_slug', 'created_at')
+    list_display = ('id', 'content_type__model', 'object_id', 'created_at')
     list_filter = ('content_type', 'created_at')
-    search_fields = ('object_slug', 'content_type')
+    search_fields = ('object_id', 'content_type')
 
     # readonly_fields = [field.name for field in ContentVisit._meta.fields]
 
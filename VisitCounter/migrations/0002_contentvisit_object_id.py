@@ -0,0 +1,43 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+
+
+def backfill_object_id(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    ContentVisit = apps.get_model('VisitCounter', 'ContentVisit')
+
+    for content_type in ContentType.objects.filter(pk__in=ContentVisit.objects.values('content_type')):
+        try:
+            related_model = apps.get_model(content_type.app_label, content_type.model)
+        except LookupError:
+            continue
+
+        # Soft-deleted objects got a "-del" suffix on their slug.
+        by_slug = related_model.objects.filter(slug=OuterRef('object_slug')).values('pk')[:1]
+        by_deleted_slug = related_model.objects.filter(
+            slug=Concat(OuterRef('object_slug'), Value('-del'))
+        ).values('pk')[:1]
+        ContentVisit.objects.filter(content_type=content_type).update(
+            object_id=Coalesce(Subquery(by_slug), Subquery(by_deleted_slug))
+        )
+
+    # Visits whose object's slug changed since can no longer be resolved.
+    ContentVisit.objects.filter(object_id=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('VisitCounter', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contentvisit',
+            name='object_id',
+            field=models.PositiveBigIntegerField(null=True, verbose_name='شناسه شی'),
+        ),
+        migrations.RunPython(backfill_object_id, migrations.RunPython.noop),
+    ]
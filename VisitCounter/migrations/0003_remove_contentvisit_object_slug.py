@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('VisitCounter', '0002_contentvisit_object_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contentvisit',
+            name='VisitCounte_content_745fd4_idx',
+        ),
+        migrations.AlterUniqueTogether(
+            name='contentvisit',
+            unique_together={('content_type', 'object_id', 'session_key')},
+        ),
+        migrations.RemoveField(
+            model_name='contentvisit',
+            name='object_slug',
+        ),
+        # One row per (object, session): a session visits many objects.
+        migrations.AlterField(
+            model_name='contentvisit',
+            name='session_key',
+            field=models.CharField(max_length=40),
+        ),
+        migrations.AlterField(
+            model_name='contentvisit',
+            name='object_id',
+            field=models.PositiveBigIntegerField(verbose_name='شناسه شی'),
+        ),
+    ]
@@ -12,21 +12,21 @@ class ContentVisit(models.Model):
         related_name='visits',
         verbose_name=_("نوع محتوا")
     )
-    object_slug = models.CharField(max_length=255, verbose_name=_("اسلاگ شی"))
-    content_object = GenericForeignKey(ct_field="content_type", fk_field="object_slug")
+    object_id = models.PositiveBigIntegerField(verbose_name=_("شناسه شی"))
+    content_object = GenericForeignKey(ct_field="content_type", fk_field="object_id")
     
-    session_key = models.CharField(max_length=40, unique=True)
+    session_key = models.CharField(max_length=40)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
-        return f"بازدید {self.content_type} ({self.object_slug}) - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
+        return f"بازدید {self.content_type} ({self.object_id}) - {self.created_at.strftime('%Y-%m-%d %H:%M:%S')}"
     
     def clean(self):
         super().clean()
         
         ALLOWED_VISIT_MODELS = ["article", "course"]
         
-        if self.content_type and self.object_slug:
+        if self.content_type and self.object_id:
             related_model = self.content_type.model_class()
             
             if related_model._meta.model_name.lower() not in ALLOWED_VISIT_MODELS:
@@ -35,7 +35,5 @@ class ContentVisit(models.Model):
     class Meta:
         verbose_name = _("بازدید محتوا")
         verbose_name_plural = _("بازدیدهای محتوا") 
-        unique_together = ('content_type', 'object_slug', 'session_key')
-        indexes = [
-            models.Index(fields=['content_type', 'object_slug', 'session_key']),
-        ]
+        # The unique index also serves the lookups, no separate index needed.
+        unique_together = ('content_type', 'object_id', 'session_key')
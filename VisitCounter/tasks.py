@@ -1,149 +1,134 @@
+from collections import Counter
+
 from celery import shared_task
 from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.cache import cache
 from django.db.models import F, Case, When, Q
 
 from .models import ContentVisit
 
 
+def get_visible_object_ids(content_type_id, object_ids):
+    model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model_class is None:
+        return set()
+    return set(
+        model_class.objects.filter(
+            pk__in=object_ids,
+            is_deleted=False,
+            is_published=True,
+        ).values_list('pk', flat=True)
+    )
+
+
+def apply_increments(field_name, increments):
+    """Adds ``increments[(content_type_id, object_id)]`` to ``field_name``, one UPDATE per model."""
+    groups = {}
+    for (content_type_id, object_id), increment in increments.items():
+        groups.setdefault(content_type_id, {})[object_id] = increment
+
+    for content_type_id, object_increments in groups.items():
+        model_class = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model_class is None:
+            continue
+
+        cases = [
+            When(pk=object_id, then=F(field_name) + increment)
+            for object_id, increment in object_increments.items()
+        ]
+        model_class.objects.filter(
+            pk__in=list(object_increments),
+            is_deleted=False,
+            is_published=True,
+        ).update(**{
+            field_name: Case(
+                *cases,
+                default=F(field_name),
+                output_field=model_class._meta.get_field(field_name).__class__()
+            )
+        })
+
+
+def parse_object_key(key):
+    """(content_type_id, object_id) of a ``content_visit:<ct>:<id>`` key, or None."""
+    parts = key.split(':')
+    try:
+        return int(parts[1]), int(parts[2])
+    except (IndexError, ValueError):
+        # e.g. a key written before visits were keyed by object id.
+        return None
+
+
 @shared_task
 def save_content_visits_to_db():
     keys_unique_view = cache.keys("content_unique_visit:*")
     keys_view = cache.keys("content_visit:*")
-    if not keys_unique_view and keys_view:
+    if not keys_unique_view and not keys_view:
         return
-    
-    views_to_create = []
-    unique_views_to_create = {}
-    objects_to_update_dict = {}
-    content_type_cache = {}
-    unique_visit_keys = []
-    
+
     # region unique view
-    
-    for key in keys_unique_view:
-        data = cache.get(key)
-        if not data:
+
+    unique_visits = set()
+    for data in cache.get_many(keys_unique_view).values():
+        if not isinstance(data, dict):
             continue
 
-        model_name = data.get('model_name')
-        object_slug = data.get('object_slug')
+        content_type_id = data.get('content_type_id')
+        object_id = data.get('object_id')
         session_key = data.get('session_key')
-        if not model_name or not object_slug or not session_key:
+        if not content_type_id or not object_id or not session_key:
             continue
 
-        unique_visit_keys.append((model_name, object_slug, session_key))
-    
-    unique_visit_keys = list(set(unique_visit_keys))
-    
+        unique_visits.add((content_type_id, object_id, session_key))
+
     query = Q()
-    for model_name, object_slug, session_key in unique_visit_keys:
-        query |= Q(content_type__model=model_name, object_slug=object_slug, session_key=session_key)
-    
+    for content_type_id, object_id, session_key in unique_visits:
+        query |= Q(content_type_id=content_type_id, object_id=object_id, session_key=session_key)
+
     existing_visits = set()
     if query:
-        for visit in ContentVisit.objects.filter(query).values(
-            'content_type__model', 'object_slug', 'session_key'
-        ):
-            key_tuple = (visit['content_type__model'], visit['object_slug'], visit['session_key'])
-            existing_visits.add(key_tuple)
-
-    for model_name, object_slug, session_key in unique_visit_keys:
-        try:
-            if model_name in content_type_cache:
-                content_type = content_type_cache[model_name]
-            else:
-                content_type = ContentType.objects.get(model=model_name)
-                content_type_cache[model_name] = content_type
-
-            model_class = content_type.model_class()
-            content = model_class.objects.get(
-                slug=object_slug,
-                is_deleted=False,
-                is_published=True,
-            )
-        except (ObjectDoesNotExist, ContentType.DoesNotExist):
-            continue
+        existing_visits = set(
+            ContentVisit.objects.filter(query).values_list('content_type_id', 'object_id', 'session_key')
+        )
+
+    new_visits = unique_visits - existing_visits
 
-        if (model_name, object_slug, session_key) not in existing_visits:
-            views_to_create.append(ContentVisit(
-                content_type=content_type,
-                object_slug=object_slug,
-                session_key=session_key,
-            ))
-            objects_to_update_dict[(model_name, object_slug)] = content
+    object_ids = {}
+    for content_type_id, object_id, _session_key in new_visits:
+        object_ids.setdefault(content_type_id, set()).add(object_id)
+    visible = {
+        (content_type_id, object_id)
+        for content_type_id, ids in object_ids.items()
+        for object_id in get_visible_object_ids(content_type_id, ids)
+    }
 
+    views_to_create = [
+        ContentVisit(content_type_id=content_type_id, object_id=object_id, session_key=session_key)
+        for content_type_id, object_id, session_key in new_visits
+        if (content_type_id, object_id) in visible
+    ]
     if views_to_create:
         ContentVisit.objects.bulk_create(views_to_create, ignore_conflicts=True)
+        apply_increments(
+            'count_unique_views',
+            Counter((visit.content_type_id, visit.object_id) for visit in views_to_create),
+        )
 
-        objects_to_update = list(objects_to_update_dict.values())
-
-        model_class.objects.filter(
-            slug__in=[obj.slug for obj in objects_to_update],
-            is_deleted=False,
-            is_published=True
-        ).update(count_unique_views=F('count_unique_views') + 1)
-
-    
     # endregion
-    
+
     # region view
-    
-    for key in keys_view:
-        cached_data = cache.get(key)
-        if not cached_data:
-            continue
-        
-        parts = key.split(':')
-        if len(parts) < 3:
-            continue
-        
-        data = key.split(':')
-        
-        model_name = parts[1]
-        object_slug = parts[2]
-        if not model_name or not object_slug:
-            continue
-        
-        key_view = f"content_visit:{model_name}:{object_slug}"
-        visit_count = cache.get(key_view)
-        if not visit_count:
-            continue
-        
-        key_tuple = (model_name, object_slug)
-        unique_views_to_create[key_tuple] = unique_views_to_create.get(key_tuple, 0) + int(visit_count)
-        
-    groups = {}
-    for (model_name, slug), total_increment in unique_views_to_create.items():
-        groups.setdefault(model_name, {})[slug] = total_increment
-    
-    for model_name, slug_dict in groups.items():
-        try:
-            content_type = ContentType.objects.get(model=model_name)
-        except ContentType.DoesNotExist:
-            continue
 
-        model_class = content_type.model_class()
+    view_increments = {}
+    for key, visit_count in cache.get_many(keys_view).items():
+        object_key = parse_object_key(key)
+        if object_key is None or not visit_count:
+            continue
+        view_increments[object_key] = view_increments.get(object_key, 0) + int(visit_count)
 
-        cases = []
-        for slug, increment in slug_dict.items():
-            cases.append(When(slug=slug, then=F('count_views') + increment))
+    apply_increments('count_views', view_increments)
 
-        model_class.objects.filter(
-            slug__in=list(slug_dict.keys()),
-            is_deleted=False,
-            is_published=True,
-        ).update(
-            count_views=Case(
-                *cases,
-                default=F('count_views'),
-                output_field=model_class._meta.get_field('count_views').__class__()
-            )
-        )
-    
     # endregion
-    
+
     if keys_view:
         cache.delete_many(keys_view)
     if keys_unique_view:
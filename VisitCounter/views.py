@@ -1,22 +1,31 @@
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.exceptions import NotFound
 from django.shortcuts import get_object_or_404
 from django.contrib.contenttypes.models import ContentType
 from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+
+from utils import get_content_type, get_object_id
 
 
 class ContentVisitView(APIView):
     def post(self, request, model_name, object_slug):
+        try:
+            content_type = get_content_type(model_name)
+            object_id = get_object_id(content_type, object_slug)
+        except (ContentType.DoesNotExist, ObjectDoesNotExist):
+            raise NotFound()
         
         session_key = request.session.session_key or request.session.create().session_key
-        cache_visitor_unique_key = f"content_unique_visit:{model_name}:{object_slug}:{session_key}"
-        cache_visitor_key = f"content_visit:{model_name}:{object_slug}"
+        cache_visitor_unique_key = f"content_unique_visit:{content_type.pk}:{object_id}:{session_key}"
+        cache_visitor_key = f"content_visit:{content_type.pk}:{object_id}"
         
         if not cache.get(cache_visitor_unique_key):
             cache.set(cache_visitor_unique_key, {
-                "model_name": model_name.lower(),
-                "object_slug": object_slug,
+                "content_type_id": content_type.pk,
+                "object_id": object_id,
                 "session_key": session_key
             }, timeout=2*3600)
         
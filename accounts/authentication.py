@@ -1,5 +1,10 @@
 from django.conf import settings
+from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from accounts.user_cache import get_cached_user
 
 
 class JWTCookieAuthentication(JWTAuthentication):
@@ -17,3 +22,26 @@ class JWTCookieAuthentication(JWTAuthentication):
         validated_token = self.get_validated_token(raw_token)
 
         return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        """
+        Resolves the user from the cached snapshot (see accounts.user_cache)
+        instead of querying it on every request. Falls back to simplejwt
+        when the cache is disabled or the password hash has to be checked.
+        """
+        if not settings.AUTH_USER_CACHE['ENABLED'] or api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = get_cached_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
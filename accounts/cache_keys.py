@@ -0,0 +1,8 @@
+# Kept out of accounts.views so signals and tasks can invalidate without importing the views.
+
+SKILLS_CACHE_KEY = 'accounts:skills'
+JOBS_CACHE_KEY = 'accounts:jobs'
+
+# Team directory document, rebuilt when its generation is bumped from accounts.signals
+TEAM_DIRECTORY_CACHE_KEY = 'accounts:team_directory'
+TEAM_DIRECTORY_GENERATION_KEY = 'accounts:generation:team_directory'
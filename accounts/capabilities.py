@@ -0,0 +1,48 @@
+from enum import IntFlag
+
+from accounts.models import EmployeeProfile
+from accounts.user_cache import get_permission_version
+from core.db_router import primary_db
+from utils import tiered_cache
+
+
+class Capability(IntFlag):
+    """What a user may do in the employee/teacher areas, cached as one integer."""
+    EMPLOYEE = 1
+    TEACHER = 2
+    PROFILE_COMPLETE = 4
+
+
+def get_capabilities_cache_key(user_id, version=None):
+    version = get_permission_version() if version is None else version
+    return f"capabilities:{user_id}:{version}"
+
+
+def compute_capabilities(user):
+    capabilities = Capability(0)
+    # Cached for everyone; a lagging replica would keep a revoked capability.
+    with primary_db():
+        if user.has_perm('accounts.can_employee'):
+            capabilities |= Capability.EMPLOYEE
+        if user.has_perm('courses.can_teacher'):
+            capabilities |= Capability.TEACHER
+        if EmployeeProfile.objects.filter(user_profile__user=user, is_profile_complete=True).exists():
+            capabilities |= Capability.PROFILE_COMPLETE
+    return capabilities
+
+
+def get_capabilities(user):
+    if not user.is_authenticated:
+        return Capability(0)
+
+    value = tiered_cache.get_or_set(
+        get_capabilities_cache_key(user.pk),
+        lambda: int(compute_capabilities(user)),
+    )
+    return Capability(value)
+
+
+def invalidate_capabilities(*user_ids):
+    # Deferred to commit by the tiered cache, so no refill sees the old rows.
+    version = get_permission_version()
+    tiered_cache.invalidate(*(get_capabilities_cache_key(user_id, version) for user_id in user_ids))
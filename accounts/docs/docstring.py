@@ -139,7 +139,7 @@ This endpoint initiates email change by sending verification email.
 
 ### Security:
 - Token expires after 24 hours
-- Only one active token per user
+- Using a token voids every earlier one
 - Rejects unverified emails
 """
 
@@ -147,11 +147,12 @@ CHANGE_EMAIL_VERIFY_DESC = """
 This endpoint verifies token and completes email change.
 
 ### Key Features:
-- Validates token against database
+- Validates the signed token and its pending email change
 - Updates user's email
 - Requires original verification token
 
 ### Security:
-- Single-use token
-- Immediately invalid after use
+- Token expires after 24 hours
+- Single-use token; using it voids every earlier one
+- Invalid once the user's email has changed
 """
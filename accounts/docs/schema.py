@@ -385,10 +385,11 @@ change_email_request_docs = extend_schema(
 
 change_email_verify_docs = extend_schema(
     summary="Verify email change",
-    description=CHANGE_PHONE_VERIFY_DESC,
+    description=CHANGE_EMAIL_VERIFY_DESC,
     parameters=[
         OpenApiParameter(
-            name="email_verify_token",
+            name="token",
+            description="Signed token from the verification email",
             type=str,
             location=OpenApiParameter.PATH
         )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from accounts.tasks import generate_avatar_thumbnail
+
+
+class Command(BaseCommand):
+    help = (
+        "Queues the thumbnail generation of every avatar without a stored "
+        "avatar_thumbnail_url, e.g. the avatars uploaded before the column existed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync',
+            action='store_true',
+            help="Generate the thumbnails in this process instead of queueing tasks.",
+        )
+
+    def handle(self, *args, **options):
+        profiles = UserProfile.objects.filter(avatar_thumbnail_url='').exclude(avatar='').exclude(avatar=None)
+
+        count = 0
+        for user_profile_id, avatar_name in profiles.values_list('pk', 'avatar').iterator():
+            if options['sync']:
+                generate_avatar_thumbnail(user_profile_id, avatar_name)
+            else:
+                generate_avatar_thumbnail.delay(user_profile_id, avatar_name)
+            count += 1
+
+        action = "Generated" if options['sync'] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{action} {count} avatar thumbnails."))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import migrate_blacklisted_tokens, purge_outstanding_tokens
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the still valid blacklisted refresh tokens from the database into "
+        "Redis and purges expired outstanding/blacklisted token rows in chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-migrate',
+            action='store_true',
+            help="Only purge, e.g. when run periodically.",
+        )
+        parser.add_argument(
+            '--purge-all',
+            action='store_true',
+            help="Also delete rows that have not expired (once Redis is the only backend).",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+
+        if not options['skip_migrate']:
+            migrated = migrate_blacklisted_tokens(chunk_size)
+            self.stdout.write(f"Migrated {migrated} blacklisted tokens to Redis.")
+
+        deleted = purge_outstanding_tokens(chunk_size, expired_only=not options['purge_all'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} outstanding tokens."))
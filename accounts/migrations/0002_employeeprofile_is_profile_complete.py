@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:55
+
+from django.db import migrations, models
+
+
+def backfill_is_profile_complete(apps, schema_editor):
+    EmployeeProfile = apps.get_model('accounts', 'EmployeeProfile')
+    EmployeeProfile.objects.filter(
+        username__isnull=False,
+        user_profile__user__first_name__isnull=False,
+        user_profile__user__last_name__isnull=False,
+        user_profile__age__isnull=False,
+        user_profile__gender__isnull=False,
+        user_profile__job__isnull=False,
+        user_profile__bio__isnull=False,
+    ).exclude(
+        user_profile__bio=''
+    ).update(is_profile_complete=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeeprofile',
+            name='is_profile_complete',
+            field=models.BooleanField(default=False, editable=False, help_text='به صورت خودکار با ویرایش پروفایل کاربر به\u200cروزرسانی می\u200cشود.', verbose_name='پروفایل کامل است'),
+        ),
+        migrations.RunPython(backfill_is_profile_complete, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking the users table.
+    atomic = False
+
+    dependencies = [
+        ('accounts', '0002_employeeprofile_is_profile_complete'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(condition=models.Q(('last_login__isnull', True)), fields=['created_at', 'id'], name='user_never_logged_in_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-19 07:59
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_user_never_logged_in_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='custom_user_email_v_8d5cf4_idx',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='email_verify_token',
+        ),
+    ]
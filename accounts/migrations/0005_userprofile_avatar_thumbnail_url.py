@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_remove_user_email_verify_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_thumbnail_url',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500, verbose_name='آدرس تصویر کوچک پروفایل'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db.models.functions import JSONObject
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, Group
 from django.utils.translation.trans_null import gettext_lazy as _
 from django.core.exceptions import ValidationError
@@ -31,12 +33,6 @@ class User(AbstractBaseUser, PermissionsMixin):
         verbose_name=_('آدرس ایمیل')
     )
     phone = PhoneNumberField(verbose_name=_('شماره موبایل'))
-    email_verify_token = models.SlugField(
-        max_length=72,
-        blank=True,
-        null=True,
-        verbose_name=_('کد تایید ایمیل')
-    )
     first_name = models.CharField(
         max_length=255,
         blank=True,
@@ -84,7 +80,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         db_table = 'custom_user'
         indexes = [
             models.Index(fields=['phone']),
-            models.Index(fields=['email_verify_token']),
+            # Walked by accounts.tasks.delete_unlogged_in_users
+            models.Index(
+                fields=['created_at', 'id'],
+                condition=models.Q(last_login__isnull=True),
+                name='user_never_logged_in_idx',
+            ),
         ]
 
     def full_name(self):
@@ -208,6 +209,13 @@ class UserProfile(models.Model):
         format='JPEG',
         options={'quality': 80}
     )
+    # Filled by accounts.tasks.generate_avatar_thumbnail, so API responses never touch the storage.
+    avatar_thumbnail_url = models.CharField(
+        max_length=500,
+        blank=True, default='',
+        editable=False,
+        verbose_name=_('آدرس تصویر کوچک پروفایل')
+    )
     bio = models.TextField(
         blank=True, null=True,
         verbose_name=_('بیوگرافی')
@@ -248,18 +256,65 @@ class UserProfile(models.Model):
         return str(self.user)
 
 
+# What makes an employee profile complete; stored in EmployeeProfile.is_profile_complete.
+COMPLETED_PROFILE_CONDITION = models.Q(
+    username__isnull=False,
+    user_profile__user__first_name__isnull=False,
+    user_profile__user__last_name__isnull=False,
+    user_profile__age__isnull=False,
+    user_profile__gender__isnull=False,
+    user_profile__job__isnull=False,
+    user_profile__bio__isnull=False,
+) & ~models.Q(user_profile__bio='')
+
+
 class EmployeeProfileManager(models.Manager):
     def filter_completed_profiles(self):
-        return self.get_queryset().filter(
-            username__isnull=False,
-            user_profile__user__first_name__isnull=False,
-            user_profile__user__last_name__isnull=False,
-            user_profile__age__isnull=False,
-            user_profile__gender__isnull=False,
-            user_profile__job__isnull=False,
-            user_profile__bio__isnull=False,
-        ).exclude(
-            user_profile__bio=''
+        return self.get_queryset().filter(is_profile_complete=True)
+
+    def with_directory_data(self):
+        """
+        Completed profiles with everything the team pages show, in one query:
+        the user row is joined and skills, roles, displayed groups and social
+        links are aggregated into arrays per profile.
+        """
+        from taggit.models import TaggedItem
+
+        return self.filter_completed_profiles().select_related(
+            'user_profile__user'
+        ).annotate(
+            skill_names=ArraySubquery(
+                Skill.objects.filter(
+                    user_profile=models.OuterRef('user_profile'), is_active=True
+                ).values('name')
+            ),
+            role_names=ArraySubquery(
+                TaggedItem.objects.filter(
+                    content_type__app_label=self.model._meta.app_label,
+                    content_type__model=self.model._meta.model_name,
+                    object_id=models.OuterRef('pk'),
+                ).values('tag__name')
+            ),
+            group_names=ArraySubquery(
+                Group.objects.filter(
+                    user=models.OuterRef('user_profile__user'), custom_group__is_display=True
+                ).values('name')
+            ),
+            social_links_data=ArraySubquery(
+                SocialLink.objects.filter(
+                    employee_profile=models.OuterRef('pk')
+                ).order_by('id').values(
+                    data=JSONObject(link='link', type_social='social_media_type')
+                )
+            ),
+        )
+
+    def refresh_profile_completion(self, **filters):
+        """Recomputes ``is_profile_complete`` of the matching profiles in one UPDATE."""
+        return self.get_queryset().filter(**filters).update(
+            is_profile_complete=models.Exists(
+                self.get_queryset().filter(COMPLETED_PROFILE_CONDITION, pk=models.OuterRef('pk'))
+            )
         )
 
 
@@ -285,6 +340,12 @@ class EmployeeProfile(models.Model):
         blank=True,
         verbose_name=_("نقش های کارمند")
     )
+    is_profile_complete = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name=_('پروفایل کامل است'),
+        help_text=_('به صورت خودکار با ویرایش پروفایل کاربر به‌روزرسانی می‌شود.'),
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name=_('تاریخ ثبت نام')
@@ -2,22 +2,18 @@ from rest_framework.permissions import BasePermission, IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from django.utils.translation import gettext_lazy as _
 
-from accounts.models import EmployeeProfile
+from accounts.capabilities import Capability, get_capabilities
 
 class IsEmployee(BasePermission):
     def has_permission(self, request, view):
         super().has_permission(request, view)
 
-        if not request.user.has_perm('accounts.can_employee'):
+        capabilities = get_capabilities(request.user)
+        if Capability.EMPLOYEE not in capabilities:
             raise PermissionDenied(_('کاربر مجوزهای لازم را ندارد.'))
 
         # Check Completed Profiles
-        try:
-            employee_profile = EmployeeProfile.objects.filter_completed_profiles().get(
-                user_profile__user=request.user
-            )
-                
-        except EmployeeProfile.DoesNotExist:
+        if Capability.PROFILE_COMPLETE not in capabilities:
             raise PermissionDenied(_('لطفاً پروفایل خود را به طور کامل پر کنید تا بتوانید ادامه دهید.'))
 
         return True
@@ -27,7 +23,7 @@ class IsEmployeeForProfile(BasePermission):
     def has_object_permission(self, request, view, obj):
         super().has_permission(request, view)
         
-        if not request.user.has_perm('accounts.can_employee'):
+        if Capability.EMPLOYEE not in get_capabilities(request.user):
             raise PermissionDenied(_('کاربر مجوزهای لازم را ندارد.'))
         
         return True
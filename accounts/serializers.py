@@ -1,10 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenBlacklistSerializer, TokenRefreshSerializer
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 
 from accounts.models import User, EmployeeProfile, Skill, Job, UserProfile, SocialLink
+from accounts.tokens import RedisRefreshToken
 from utils import verify_otp_auth_num, verify_otp_change_phone, BaseNameRelatedField, verify_otp_reset_password
 
 
@@ -60,6 +62,14 @@ class VerifyOTPSerializer(serializers.Serializer):
         return value
     
 
+class RefreshTokenSerializer(TokenRefreshSerializer):
+    token_class = RedisRefreshToken
+
+
+class LogoutSerializer(TokenBlacklistSerializer):
+    token_class = RedisRefreshToken
+
+
 class BaseLoginSerializer(serializers.Serializer):
     password = serializers.CharField(write_only=True)
 
@@ -100,10 +110,9 @@ class EmployeeListSerializer(serializers.ModelSerializer):
     def get_full_name(self, obj):
         return obj.user_profile.user.full_name()
     
+    # Use EmployeeProfile.objects.with_directory_data() to avoid a query per row.
     def get_avatar_thumbnail(self, obj):
-        if obj.user_profile.avatar_thumbnail and hasattr(obj.user_profile.avatar_thumbnail, 'url'):
-            return obj.user_profile.avatar_thumbnail.url
-        return None
+        return obj.user_profile.avatar_thumbnail_url or None
 
 
 class EmployeeDetailSerializer(serializers.ModelSerializer):
@@ -123,11 +132,18 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
             'skills', 'roles', 'social_links'
         )
         
+    # The get_* methods below read the arrays annotated by
+    # EmployeeProfile.objects.with_directory_data() when available.
+    
     def get_skills(self, obj):
+        if hasattr(obj, 'skill_names'):
+            return obj.skill_names
         skills = obj.user_profile.skills.filter(is_active=True).values_list('name', flat=True)
         return list(skills)
         
     def get_roles(self, obj):
+        if hasattr(obj, 'role_names'):
+            return obj.role_names
         roles = obj.roles.names()
         return list(roles)
     
@@ -135,12 +151,16 @@ class EmployeeDetailSerializer(serializers.ModelSerializer):
         return str(obj.user_profile.bio)
         
     def get_groups(self, obj):
+        if hasattr(obj, 'group_names'):
+            return obj.group_names
         group_names = obj.user_profile.user.groups.filter(
             custom_group__is_display=True
         ).values_list('name', flat=True)
         return list(group_names)
     
     def get_social_links(self, obj):
+        if hasattr(obj, 'social_links_data'):
+            return obj.social_links_data
         social_links = obj.social_link.all()
         return [
             {
@@ -1,11 +1,17 @@
-from django.db.models.signals import post_save, post_migrate
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate, m2m_changed
 from django.contrib.auth.models import Permission, Group
 from django.contrib.contenttypes.models import ContentType
 from django.dispatch import receiver
-from accounts.models import JobCategory, EmployeeProfile, CustomGroup
+from taggit.models import TaggedItem
+from accounts.models import JobCategory, EmployeeProfile, CustomGroup, Skill, Job, User, UserProfile, SocialLink
+from accounts.cache_keys import SKILLS_CACHE_KEY, JOBS_CACHE_KEY, TEAM_DIRECTORY_GENERATION_KEY
+from accounts.user_cache import invalidate_cached_user, invalidate_all_cached_users
+from accounts.capabilities import invalidate_capabilities
 from courses.models import Course
+from comments.thread_cache import bump_user_threads
 # from blog.models import Article # (uncomment if needed)
-from utils import update_descendants_active_status
+from utils import update_descendants_active_status, tiered_cache, protected_cache
 
 
 @receiver(post_save, sender=JobCategory)
@@ -13,6 +19,172 @@ def update_job_category_status(sender, instance, **kwargs):
     update_descendants_active_status(instance)
 
 
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+def invalidate_skills_cache(sender, instance, **kwargs):
+    tiered_cache.invalidate(SKILLS_CACHE_KEY)
+
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_jobs_cache(sender, instance, **kwargs):
+    tiered_cache.invalidate(JOBS_CACHE_KEY)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+    invalidate_capabilities(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_cache_on_permissions_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        invalidate_cached_user(instance.pk)
+        invalidate_capabilities(instance.pk)
+    elif pk_set:
+        # e.g. group.user_set.add(...)
+        invalidate_cached_user(*pk_set)
+        invalidate_capabilities(*pk_set)
+    else:
+        # Cleared from the group/permission side: the affected users are unknown.
+        invalidate_all_cached_users()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_user_cache_on_group_permissions_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_all_cached_users()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_user_cache_on_group_delete(sender, instance, **kwargs):
+    invalidate_all_cached_users()
+
+
+# region Profile Completion
+
+PROFILE_COMPLETION_USER_FIELDS = {'first_name', 'last_name'}
+
+
+@receiver(post_save, sender=User)
+def refresh_profile_completion_on_user_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not PROFILE_COMPLETION_USER_FIELDS.intersection(update_fields):
+        return
+    EmployeeProfile.objects.refresh_profile_completion(user_profile__user=instance)
+
+
+@receiver(post_save, sender=UserProfile)
+def refresh_profile_completion_on_user_profile_save(sender, instance, **kwargs):
+    EmployeeProfile.objects.refresh_profile_completion(user_profile=instance)
+    invalidate_capabilities(instance.user_id)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+def refresh_profile_completion_on_employee_profile_save(sender, instance, created=False, **kwargs):
+    if kwargs['signal'] is post_save:
+        EmployeeProfile.objects.refresh_profile_completion(pk=instance.pk)
+
+    user_id = UserProfile.objects.filter(pk=instance.user_profile_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_capabilities(user_id)
+
+# endregion
+
+
+# region Avatar Thumbnail
+
+@receiver(pre_save, sender=UserProfile)
+def reset_avatar_thumbnail_url(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'avatar' not in update_fields:
+        instance._avatar_changed = False
+        return
+
+    previous_avatar = None
+    if instance.pk:
+        previous_avatar = UserProfile.objects.filter(pk=instance.pk).values_list('avatar', flat=True).first()
+
+    # A new upload is not committed yet, so its name is still the uploaded file name.
+    instance._avatar_changed = (instance.avatar.name or '') != (previous_avatar or '')
+    if instance._avatar_changed:
+        instance.avatar_thumbnail_url = ''
+
+
+@receiver(post_save, sender=UserProfile)
+def queue_avatar_thumbnail(sender, instance, **kwargs):
+    if not getattr(instance, '_avatar_changed', False):
+        return
+    if not instance.avatar:
+        bump_user_threads(instance.user_id)
+        return
+
+    from accounts.tasks import generate_avatar_thumbnail
+    user_profile_id, avatar_name = instance.pk, instance.avatar.name
+    transaction.on_commit(lambda: generate_avatar_thumbnail.delay(user_profile_id, avatar_name))
+
+# endregion
+
+
+# region Team Directory
+
+def bump_team_directory():
+    protected_cache.bump_generation(TEAM_DIRECTORY_GENERATION_KEY)
+
+
+@receiver(post_save, sender=EmployeeProfile)
+@receiver(post_delete, sender=EmployeeProfile)
+@receiver(post_save, sender=SocialLink)
+@receiver(post_delete, sender=SocialLink)
+@receiver(post_save, sender=Skill)
+@receiver(post_delete, sender=Skill)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=CustomGroup)
+@receiver(post_delete, sender=CustomGroup)
+def invalidate_team_directory(sender, instance, **kwargs):
+    bump_team_directory()
+
+
+# What the team pages show of users and their profiles, including what
+# makes an employee profile complete.
+TEAM_DIRECTORY_USER_FIELDS = {'first_name', 'last_name'}
+TEAM_DIRECTORY_USER_PROFILE_FIELDS = {'bio', 'avatar', 'avatar_thumbnail_url', 'age', 'gender', 'job'}
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=UserProfile)
+def invalidate_team_directory_on_user_change(sender, instance, update_fields=None, **kwargs):
+    fields = TEAM_DIRECTORY_USER_FIELDS if sender is User else TEAM_DIRECTORY_USER_PROFILE_FIELDS
+    if update_fields is not None and not fields.intersection(update_fields):
+        # e.g. a last_login update
+        return
+
+    # Most users are not employees; don't rebuild the directory on their saves.
+    lookup = {'user_profile__user': instance} if sender is User else {'user_profile': instance}
+    if EmployeeProfile.objects.filter(**lookup).exists():
+        bump_team_directory()
+
+
+@receiver(m2m_changed, sender=UserProfile.skills.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=TaggedItem)
+def invalidate_team_directory_on_relation_change(sender, instance, action, **kwargs):
+    if sender is TaggedItem and not isinstance(instance, EmployeeProfile):
+        # Tags of other models (e.g. courses) share the same through model.
+        return
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_team_directory()
+
+# endregion
+
+
 @receiver(post_migrate)
 def create_permissions(sender, **kwargs):
     if sender.name == 'accounts':
@@ -0,0 +1,184 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_KEY = 'sms:outbox'
+SCHEDULED_KEY = 'sms:dispatch_scheduled'
+METRICS_KEY = 'sms:metrics'
+
+OTP_MESSAGE = 'Your OTP is: {otp}'
+
+
+# region Providers
+
+class BaseSMSProvider:
+    """
+    Interface of an SMS gateway. One instance lives per worker process, so
+    implementations should keep their HTTP session / connection open between
+    batches (``open`` is called lazily, ``close`` on shutdown).
+    """
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+    def send_batch(self, messages):
+        """
+        Sends a list of ``{'phone': ..., 'text': ...}`` messages.
+        :return: The messages that could not be delivered (to be retried).
+        """
+        raise NotImplementedError('.send_batch() must be overridden')
+
+
+class ConsoleSMSProvider(BaseSMSProvider):
+    """Development provider: writes the messages to stdout."""
+
+    def send_batch(self, messages):
+        for message in messages:
+            print(f"SMS to {message['phone']}: {message['text']}")
+        return []
+
+
+class LocMemSMSProvider(BaseSMSProvider):
+    """Test provider: keeps the sent messages in ``LocMemSMSProvider.outbox``."""
+
+    outbox = []
+
+    def send_batch(self, messages):
+        LocMemSMSProvider.outbox.extend(messages)
+        return []
+
+
+_provider = None
+
+
+def get_sms_provider():
+    global _provider
+    if _provider is None:
+        _provider = import_string(settings.SMS['PROVIDER'])()
+        _provider.open()
+    return _provider
+
+# endregion
+
+
+def _get_redis():
+    from django_redis import get_redis_connection
+    return get_redis_connection('default')
+
+
+def enqueue_sms(phone, text, ttl=None):
+    """
+    Queues a message for the next micro-batch. Only the first message of a
+    batch schedules the dispatch task, so a login spike results in a handful
+    of tasks (and provider calls) instead of one per message.
+
+    A message with a ``ttl`` (seconds) is dropped instead of sent or retried
+    once it is older than that, e.g. an OTP that has expired meanwhile.
+    """
+    expires_at = time.time() + ttl if ttl is not None else None
+    message = json.dumps({'phone': str(phone), 'text': str(text), 'attempts': 0, 'expires_at': expires_at})
+    config = settings.SMS
+
+    pipeline = _get_redis().pipeline()
+    pipeline.rpush(cache.make_key(OUTBOX_KEY), message)
+    pipeline.set(cache.make_key(SCHEDULED_KEY), 1, nx=True, ex=config['SCHEDULE_TIMEOUT'])
+    _, scheduled = pipeline.execute()
+
+    if scheduled:
+        from accounts.tasks import dispatch_sms_batch
+        dispatch_sms_batch.apply_async(countdown=config['BATCH_DELAY'])
+
+
+def enqueue_otp(phone, otp):
+    enqueue_sms(phone, OTP_MESSAGE.format(otp=otp), ttl=settings.OTP['EXPIRATION_TIME_SECONDS'])
+
+
+def dispatch_outbox():
+    """
+    Drains the outbox in batches of ``SMS['BATCH_SIZE']``.
+    :return: The messages that failed and are still worth retrying.
+    """
+    redis = _get_redis()
+    outbox_key = cache.make_key(OUTBOX_KEY)
+    # Messages queued from now on schedule the next dispatch.
+    redis.delete(cache.make_key(SCHEDULED_KEY))
+
+    retry = []
+    while True:
+        raw_messages = redis.lpop(outbox_key, settings.SMS['BATCH_SIZE'])
+        if not raw_messages:
+            break
+        retry.extend(send_messages([json.loads(raw) for raw in raw_messages]))
+    return retry
+
+
+def is_expired(message, now=None):
+    expires_at = message.get('expires_at')
+    return expires_at is not None and expires_at <= (time.time() if now is None else now)
+
+
+def send_messages(messages):
+    """Sends one batch through the provider and records delivery metrics."""
+    now = time.time()
+    expired = [message for message in messages if is_expired(message, now)]
+    if expired:
+        logger.warning("Dropping %s expired SMS messages", len(expired))
+        messages = [message for message in messages if not is_expired(message, now)]
+
+    started = time.monotonic()
+    failed = []
+    if messages:
+        try:
+            failed = get_sms_provider().send_batch(messages)
+        except Exception as e:
+            logger.error("Error sending SMS batch of %s messages: %s", len(messages), e)
+            failed = messages
+    elapsed_ms = int((time.monotonic() - started) * 1000)
+
+    retry = []
+    dropped = 0
+    for message in failed:
+        message['attempts'] += 1
+        if message['attempts'] < settings.SMS['MAX_RETRIES']:
+            retry.append(message)
+        else:
+            dropped += 1
+            logger.error("Dropping SMS to %s after %s attempts", message['phone'], message['attempts'])
+
+    try:
+        pipeline = _get_redis().pipeline()
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'batches', 1)
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'sent', len(messages) - len(failed))
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'failed', len(failed))
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'dropped', dropped)
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'expired', len(expired))
+        pipeline.hincrby(cache.make_key(METRICS_KEY), 'send_ms', elapsed_ms)
+        pipeline.execute()
+    except Exception as e:
+        logger.warning("Error recording SMS metrics: %s", e)
+
+    return retry
+
+
+def get_sms_metrics():
+    metrics = {
+        key.decode(): int(value)
+        for key, value in _get_redis().hgetall(cache.make_key(METRICS_KEY)).items()
+    }
+    batches = metrics.get('batches', 0)
+    return {
+        **metrics,
+        'queued': _get_redis().llen(cache.make_key(OUTBOX_KEY)),
+        'avg_batch_size': round((metrics.get('sent', 0) + metrics.get('failed', 0)) / batches, 2) if batches else 0,
+        'avg_send_ms': round(metrics.get('send_ms', 0) / batches, 2) if batches else 0,
+    }
@@ -1,13 +1,48 @@
+import logging
+import time
+
 from core.celery import app
 from celery import shared_task
-from accounts.models import User
+from accounts.models import User, UserProfile, EmployeeProfile
+from accounts.sms import dispatch_outbox, enqueue_otp, send_messages
 from datetime import timedelta
 from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.cache_keys import TEAM_DIRECTORY_GENERATION_KEY
+from comments.thread_cache import bump_user_threads
+from utils import protected_cache
+
+
+logger = logging.getLogger(__name__)
 
 
 @app.task
-def send_otp_to_phone_tasks(otp):
-    print(f'Your OTP is: {otp}')
+def send_otp_to_phone_tasks(otp, phone=None):
+    # Kept for already queued messages; new code calls accounts.sms.enqueue_otp.
+    if phone is None:
+        print(f'Your OTP is: {otp}')
+        return
+    enqueue_otp(phone, otp)
+
+
+# Every message counts its own attempts against SMS['MAX_RETRIES'].
+@app.task(bind=True, max_retries=None)
+def dispatch_sms_batch(self, messages=None):
+    """
+    Sends the queued SMS micro-batch (or, on retry, the messages that failed).
+    Failed messages are retried with exponential backoff; expired ones (OTPs)
+    are dropped instead.
+    """
+    retry = send_messages(messages) if messages else dispatch_outbox()
+    if not retry:
+        return
+
+    attempts = max(message['attempts'] for message in retry)
+    countdown = settings.SMS['RETRY_BACKOFF'] * 2 ** (attempts - 1)
+    raise self.retry(args=[retry], countdown=countdown)
 
 
 @app.task
@@ -16,32 +51,81 @@ def send_email_tasks(content):
 
 
 @shared_task
-def delete_unlogged_in_users(hours=24):
+def delete_unlogged_in_users(hours=24, chunk_size=500, dry_run=False):
+    """
+    Deletes users who signed up more than ``hours`` ago and never logged in.
+
+    Walks the partial (created_at, id) index in keyset chunks; each chunk is
+    deleted (with its cascades) in its own short transaction, so a large
+    backlog never holds long locks on the users table.
+    """
     # Calculate the date threshold
     hours_ago = timezone.now() - timedelta(hours=hours)
+    started = time.monotonic()
 
-    # Filter users created before the threshold and who haven't logged in
-    users_to_delete = User.objects.filter(
+    candidates = User.objects.filter(
         created_at__lt=hours_ago,
-        last_login__is_null=True,
+        last_login__isnull=True,
         is_superuser=False,
         is_admin=False,
-    )
+    ).order_by('created_at', 'id')
+
+    metrics = {'dry_run': dry_run, 'delete_count': 0, 'chunks': 0}
+    cursor = None
+
+    while True:
+        chunk = candidates
+        if cursor:
+            last_created_at, last_id = cursor
+            chunk = chunk.filter(
+                Q(created_at__gt=last_created_at) | Q(created_at=last_created_at, id__gt=last_id)
+            )
+        chunk = list(chunk.values_list('id', 'created_at')[:chunk_size])
+        if not chunk:
+            break
+
+        cursor = (chunk[-1][1], chunk[-1][0])
+        ids = [user_id for user_id, _created_at in chunk]
 
-    # Check if there are users to delete
-    if not users_to_delete.exists():
-        return "No users to delete."
+        if dry_run:
+            deleted = len(ids)
+        else:
+            with transaction.atomic():
+                # Re-check the whole predicate: the user may have logged in or
+                # been made an admin meanwhile.
+                _total, per_model = candidates.filter(id__in=ids).delete()
+            deleted = per_model.get(User._meta.label, 0)
 
-    # Store info of users to be deleted
-    deleted_users_info = list(users_to_delete.values('id', 'phone', 'email', 'created_at'))
+        metrics['delete_count'] += deleted
+        metrics['chunks'] += 1
+        logger.info(
+            "delete_unlogged_in_users: chunk %s, %s users%s (%s total)",
+            metrics['chunks'], deleted, ' (dry run)' if dry_run else '', metrics['delete_count'],
+        )
 
-    # Delete users and get the count
-    delete_count = users_to_delete.count()
-    users_to_delete.delete()
+    metrics['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    return metrics
+
+
+@shared_task
+def generate_avatar_thumbnail(user_profile_id, avatar_name):
+    """
+    Generates the ``avatar_thumbnail`` of this avatar file and stores its
+    URL in ``UserProfile.avatar_thumbnail_url``. Does nothing if the avatar
+    was replaced meanwhile; that change queued its own task.
+    """
+    user_profile = UserProfile.objects.filter(pk=user_profile_id).first()
+    if user_profile is None or user_profile.avatar.name != avatar_name:
+        return None
 
-    # Return count and deleted users' info
-    return {
-        'delete_count': delete_count,
-        'deleted_users': deleted_users_info
-    }
+    thumbnail = user_profile.avatar_thumbnail
+    thumbnail.generate()
+    url = thumbnail.url
 
+    updated = UserProfile.objects.filter(pk=user_profile_id, avatar=avatar_name).update(avatar_thumbnail_url=url)
+    if updated:
+        # Pages cached meanwhile (or before the change) show no or the old avatar.
+        bump_user_threads(user_profile.user_id)
+        if EmployeeProfile.objects.filter(user_profile_id=user_profile_id).exists():
+            protected_cache.bump_generation(TEAM_DIRECTORY_GENERATION_KEY)
+    return url
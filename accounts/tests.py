@@ -1,3 +1,114 @@
-from django.test import TestCase
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from celery.exceptions import Retry
+from django.conf import settings
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from accounts import sms
+from accounts.sms import OUTBOX_KEY, LocMemSMSProvider
+from accounts.tasks import dispatch_sms_batch
+
+
+class FailingSMSProvider(LocMemSMSProvider):
+    def send_batch(self, messages):
+        return messages
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+SMS_SETTINGS = {
+    'PROVIDER': 'accounts.sms.LocMemSMSProvider',
+    'BATCH_SIZE': 2,
+    'BATCH_DELAY': 0.05,
+    'SCHEDULE_TIMEOUT': 60,
+    'MAX_RETRIES': 3,
+    'RETRY_BACKOFF': 2,
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SMS=SMS_SETTINGS)
+class SMSDispatchTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        for patcher in (
+            mock.patch('accounts.sms._get_redis', return_value=self.redis),
+            mock.patch('accounts.sms._provider', None),
+            mock.patch.object(LocMemSMSProvider, 'outbox', []),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        schedule = mock.patch('accounts.tasks.dispatch_sms_batch.apply_async')
+        self.apply_async = schedule.start()
+        self.addCleanup(schedule.stop)
+
+    def test_enqueue_schedules_one_dispatch_per_batch(self):
+        for i in range(3):
+            sms.enqueue_sms(f'+98912000000{i}', 'hello')
+
+        self.apply_async.assert_called_once_with(countdown=SMS_SETTINGS['BATCH_DELAY'])
+        self.assertEqual(self.redis.llen(cache.make_key(OUTBOX_KEY)), 3)
+
+    def test_dispatch_drains_the_outbox_in_batches(self):
+        for i in range(3):
+            sms.enqueue_sms(f'+98912000000{i}', 'hello')
+
+        with mock.patch.object(LocMemSMSProvider, 'send_batch', autospec=True, side_effect=lambda self, messages: []) as send_batch:
+            self.assertEqual(sms.dispatch_outbox(), [])
+
+        self.assertEqual([len(call.args[1]) for call in send_batch.call_args_list], [2, 1])
+        self.assertEqual(self.redis.llen(cache.make_key(OUTBOX_KEY)), 0)
+
+        # The next message opens a new batch.
+        sms.enqueue_sms('+989120000009', 'hello')
+        self.assertEqual(self.apply_async.call_count, 2)
+
+    def test_sent_messages_reach_the_provider(self):
+        sms.enqueue_otp('+989120000000', 123456)
+        sms.dispatch_outbox()
+
+        self.assertEqual([message['text'] for message in LocMemSMSProvider.outbox], ['Your OTP is: 123456'])
+        self.assertEqual(sms.get_sms_metrics()['sent'], 1)
+
+    @override_settings(SMS={**SMS_SETTINGS, 'PROVIDER': 'accounts.tests.FailingSMSProvider'})
+    def test_failed_messages_are_dropped_after_max_retries(self):
+        messages = [{'phone': '+989120000000', 'text': 'hello', 'attempts': 0, 'expires_at': None}]
+
+        for attempt in range(1, SMS_SETTINGS['MAX_RETRIES']):
+            messages = sms.send_messages(messages)
+            self.assertEqual(messages[0]['attempts'], attempt)
+
+        self.assertEqual(sms.send_messages(messages), [])
+        self.assertEqual(sms.get_sms_metrics()['dropped'], 1)
+
+    @override_settings(SMS={**SMS_SETTINGS, 'PROVIDER': 'accounts.tests.FailingSMSProvider'})
+    def test_failed_batch_is_retried_with_backoff(self):
+        messages = [{'phone': '+989120000000', 'text': 'hello', 'attempts': 1, 'expires_at': None}]
+
+        with mock.patch.object(dispatch_sms_batch, 'retry', side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                dispatch_sms_batch(messages)
+
+        retried = retry.call_args.kwargs['args'][0]
+        self.assertEqual([message['attempts'] for message in retried], [2])
+        self.assertEqual(retry.call_args.kwargs['countdown'], SMS_SETTINGS['RETRY_BACKOFF'] * 2)
+
+    @override_settings(SMS={**SMS_SETTINGS, 'PROVIDER': 'accounts.tests.FailingSMSProvider'})
+    def test_expired_otp_is_dropped_instead_of_retried(self):
+        messages = [{'phone': '+989120000000', 'text': 'Your OTP is: 1', 'attempts': 1, 'expires_at': time.time() - 1}]
+
+        with mock.patch.object(dispatch_sms_batch, 'retry') as retry:
+            dispatch_sms_batch(messages)
+
+        retry.assert_not_called()
+        self.assertEqual(sms.get_sms_metrics()['expired'], 1)
+
+    def test_otp_expires_with_the_code(self):
+        with override_settings(OTP={**settings.OTP, 'EXPIRATION_TIME_SECONDS': 120}):
+            sms.enqueue_otp('+989120000000', 123456)
+
+        message = json.loads(self.redis.lindex(cache.make_key(OUTBOX_KEY), 0))
+        self.assertAlmostEqual(message['expires_at'], time.time() + 120, delta=5)
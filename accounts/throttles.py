@@ -1,7 +1,7 @@
-import time
+import uuid
 from django.core.cache import cache
 from django.conf import settings
-from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+from rest_framework.throttling import BaseThrottle
 from rest_framework.exceptions import Throttled
 
 
@@ -17,7 +17,198 @@ class CustomThrottled(Throttled):
         return self.detail
 
 
-class IPThrottling(BaseThrottle):
+# region Sliding Window Limiter
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window log limiter over a Redis sorted set, supporting several
+    (window, limit) pairs on the same key.
+
+    The whole check (trim, count, record) runs as one Lua script, so it costs a
+    single round trip and cannot overshoot under concurrent requests. Time is
+    taken from the Redis server so all app servers share the same clock.
+    """
+
+    # KEYS[1]: sorted set of request times (ms)
+    # ARGV[1]: unique member for this request, ARGV[2..]: window_ms, limit pairs
+    # Returns {allowed, wait_ms}
+    script = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+    local longest = 0
+    for i = 2, #ARGV, 2 do
+        longest = math.max(longest, tonumber(ARGV[i]))
+    end
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - longest - 1)
+
+    local wait = 0
+    for i = 2, #ARGV, 2 do
+        local window = tonumber(ARGV[i])
+        local limit = tonumber(ARGV[i + 1])
+        local count = redis.call('ZCOUNT', KEYS[1], now - window, '+inf')
+        if count >= limit then
+            -- A slot frees up once the request that pushed us over the limit leaves the window
+            local entry = redis.call(
+                'ZRANGEBYSCORE', KEYS[1], now - window, '+inf', 'WITHSCORES', 'LIMIT', count - limit, 1
+            )
+            wait = math.max(wait, tonumber(entry[2]) + window - now)
+        end
+    end
+
+    if wait > 0 then
+        return {0, wait}
+    end
+
+    redis.call('ZADD', KEYS[1], now, ARGV[1])
+    redis.call('PEXPIRE', KEYS[1], longest)
+    return {1, 0}
+    """
+
+    def __init__(self, windows):
+        """
+        :param windows: Iterable of (window_seconds, max_requests) pairs.
+        """
+        self.windows = [(int(window * 1000), int(limit)) for window, limit in windows]
+        self._script = None
+
+    def get_script(self):
+        if self._script is None:
+            from django_redis import get_redis_connection
+            self._script = get_redis_connection('default').register_script(self.script)
+        return self._script
+
+    def get_args(self):
+        args = [uuid.uuid4().hex]
+        for window, limit in self.windows:
+            args.extend((window, limit))
+        return args
+
+    def hit(self, key):
+        """
+        Records a request for ``key`` if every window allows it.
+        :return: (allowed, wait) where wait is in seconds.
+        """
+        allowed, wait = self.get_script()(keys=[cache.make_key(key)], args=self.get_args())
+        return bool(allowed), int(wait) / 1000
+
+
+class SlidingWindowCounterLimiter(SlidingWindowLimiter):
+    """
+    Approximated sliding window built from two fixed-size buckets per window
+    (the current and the previous one), stored in a single Redis hash.
+
+    The previous bucket is weighted by how much of it still overlaps the
+    sliding window, so memory stays O(1) per key no matter how many requests
+    arrive, at the cost of assuming requests were evenly spread over the
+    previous bucket.
+    """
+
+    # KEYS[1]: hash with <i>:bucket, <i>:current and <i>:previous fields per window
+    # ARGV: window_ms, limit pairs
+    # Returns {allowed, wait_ms}
+    script = """
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+
+    local state = {}
+    local longest = 0
+    local wait = 0
+
+    for i = 1, #ARGV, 2 do
+        local window = tonumber(ARGV[i])
+        local limit = tonumber(ARGV[i + 1])
+        longest = math.max(longest, window)
+
+        local bucket = math.floor(now / window)
+        local stored = redis.call('HMGET', KEYS[1], i .. ':bucket', i .. ':current', i .. ':previous')
+        local stored_bucket = tonumber(stored[1])
+        local current = tonumber(stored[2]) or 0
+        local previous = tonumber(stored[3]) or 0
+
+        if stored_bucket ~= bucket then
+            if stored_bucket == bucket - 1 then
+                previous = current
+            else
+                previous = 0
+            end
+            current = 0
+        end
+
+        local elapsed = now - bucket * window
+        local estimate = previous * (window - elapsed) / window + current
+
+        if estimate + 1 > limit then
+            local allowed_estimate = limit - 1
+            local window_wait
+            if current > allowed_estimate then
+                -- Even with the previous bucket gone, wait for the current one to slide out
+                window_wait = (window - elapsed) + window * (1 - allowed_estimate / current)
+            else
+                window_wait = window * (1 - (allowed_estimate - current) / previous) - elapsed
+            end
+            wait = math.max(wait, math.ceil(window_wait))
+        end
+
+        table.insert(state, {i, bucket, current, previous})
+    end
+
+    if wait > 0 then
+        return {0, wait}
+    end
+
+    for _, window in ipairs(state) do
+        local i = window[1]
+        redis.call(
+            'HSET', KEYS[1],
+            i .. ':bucket', window[2],
+            i .. ':current', window[3] + 1,
+            i .. ':previous', window[4]
+        )
+    end
+    -- The previous bucket of the longest window must survive a full window
+    redis.call('PEXPIRE', KEYS[1], 2 * longest)
+    return {1, 0}
+    """
+
+    def get_args(self):
+        return [value for pair in self.windows for value in pair]
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Base class of the throttles below; subclasses only provide the windows
+    and how a request is identified (``get_cache_key``).
+    """
+    scope = None
+    limiter_class = SlidingWindowLimiter
+
+    def __init__(self, windows):
+        self.limiter = self.limiter_class(windows)
+        self.key = None
+        self._wait = None
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.key = self.get_cache_key(request, view)
+        if not self.key:
+            return True
+
+        allowed, self._wait = self.limiter.hit(self.key)
+        if not allowed:
+            raise CustomThrottled(wait=self.wait())
+        return True
+
+    def wait(self):
+        """Remaining time reported by the last check; no extra round trip."""
+        return self._wait or None
+
+# endregion
+
+
+class IPThrottling(SlidingWindowThrottle):
     """
     Custom throttle class that enforces rate limiting based on configurable time windows.
     """
@@ -34,6 +225,7 @@ class IPThrottling(BaseThrottle):
         self.scope = scope
         self.time_out = time_out
         self.max_requests = max_requests
+        super().__init__([(time_out, max_requests)])
 
     def get_cache_key(self, request, view):
         """
@@ -45,42 +237,10 @@ class IPThrottling(BaseThrottle):
         ip = self.get_ident(request)  # Identifies the client by their IP address
         return f"{self.scope}:{ip}"
 
-    def allow_request(self, request, view):
-        self.key = self.get_cache_key(request, view)
-        if not self.key:
-            return True
-
-        throttle_data = cache.get(self.key)
-        now = time.time()
-
-        if throttle_data:
-            request_count, first_request_time = throttle_data
-            elapsed_time = now - float(first_request_time)
-
-            if elapsed_time < self.time_out:
-                if request_count < self.max_requests:
-                    cache.set(self.key, (request_count + 1, first_request_time), timeout=self.time_out)
-                    return True
-                raise CustomThrottled(wait=self.wait())
-
-            cache.set(self.key, (1, now), timeout=self.time_out)
-            return True
-
-        cache.set(self.key, (1, now), timeout=self.time_out)
-        return True
-
-    def wait(self):
-        throttle_data = cache.get(self.key)
-        if not throttle_data:
-            return None
-        request_count, first_request_time = throttle_data
-        remaining_time = self.time_out - (time.time() - float(first_request_time))
-        return max(0, remaining_time)
-
 
 # region Phone Throttle
 
-class PhoneThrottle(BaseThrottle):
+class PhoneThrottle(SlidingWindowThrottle):
     """
     Throttle class that allows configuration of scope, time_out, and max_requests.
     """
@@ -88,6 +248,7 @@ class PhoneThrottle(BaseThrottle):
         self.scope = scope
         self.time_out = time_out
         self.max_requests = max_requests
+        super().__init__([(time_out, max_requests)])
 
     def get_cache_key(self, request, view):
         phone = request.data.get("phone")
@@ -95,49 +256,21 @@ class PhoneThrottle(BaseThrottle):
             return None
         return f"{self.scope}:{phone}"
 
-    def allow_request(self, request, view):
-        self.key = self.get_cache_key(request, view)
-        if not self.key:
-            return True
-
-        throttle_data = cache.get(self.key)
-        now = time.time()
-
-        if throttle_data:
-            request_count, first_request_time = throttle_data
-            elapsed_time = now - float(first_request_time)
-
-            if elapsed_time < self.time_out:
-                if request_count < self.max_requests:
-                    cache.set(self.key, (request_count + 1, first_request_time), timeout=self.time_out)
-                    return True
-                raise CustomThrottled(wait=self.wait())
-
-            cache.set(self.key, (1, now), timeout=self.time_out)
-            return True
-
-        cache.set(self.key, (1, now), timeout=self.time_out)
-        return True
-
-    def wait(self):
-        throttle_data = cache.get(self.key)
-        if not throttle_data:
-            return None
-        request_count, first_request_time = throttle_data
-        remaining_time = self.time_out - (time.time() - float(first_request_time))
-        return max(0, remaining_time)
-
 # endregion
 
 
 # region Dual Throttle
 
-class DualThrottle(BaseThrottle):
+class DualThrottle(SlidingWindowThrottle):
     """
     A throttle class that supports dual time-based limits:
     1. Short-term limit (e.g., 1 request every 120 seconds).
     2. Long-term limit (e.g., 15 requests every 2 hours).
+    Both limits are checked and recorded in the same atomic call, on
+    fixed-size counters so a flood of requests for one phone cannot grow its state.
     """
+    limiter_class = SlidingWindowCounterLimiter
+
     def __init__(
         self, scope='phone_dual_throttle',
         short_time_out=settings.OTP["EXPIRATION_TIME_SECONDS"],
@@ -149,82 +282,11 @@ class DualThrottle(BaseThrottle):
         self.short_max_requests = short_max_requests  # Max requests in short-term window
         self.long_time_out = long_time_out  # Long-term time window in seconds
         self.long_max_requests = long_max_requests  # Max requests in long-term window
+        super().__init__([
+            (short_time_out, short_max_requests),
+            (long_time_out, long_max_requests),
+        ])
 
-    def get_cache_key(self, request, view):
-        """
-        Generates a cache key for the user based on the throttle scope and phone number.
-        """
-        phone = request.data.get("phone")
-        if not phone:
-            return None
-        return f"{self.scope}:{phone}"
-
-    def get_throttle_data(self, key):
-        """
-        Retrieves throttle data from cache.
-        :param key: Cache key.
-        :return: List of timestamps of past requests.
-        """
-        return cache.get(key, [])
-
-    def set_throttle_data(self, key, timestamps):
-        """
-        Stores updated request timestamps in cache.
-        :param key: Cache key.
-        :param timestamps: List of timestamps.
-        """
-        # Set expiration time to the maximum of both time windows
-        cache.set(key, timestamps, timeout=max(self.short_time_out, self.long_time_out))
-
-    def allow_request(self, request, view):
-        """
-        Checks if the request is allowed under both short-term and long-term limits.
-        """
-        self.key = self.get_cache_key(request, view)
-        if not self.key:
-            return True
-
-        now = time.time()
-        timestamps = self.get_throttle_data(self.key)
-
-        # Remove timestamps outside of both time windows
-        timestamps = [ts for ts in timestamps if now - ts <= self.long_time_out]
-
-        # Check short-term limit
-        short_term_timestamps = [ts for ts in timestamps if now - ts <= self.short_time_out]
-        if len(short_term_timestamps) >= self.short_max_requests:
-            wait_time = self.short_time_out - (now - short_term_timestamps[0])
-            raise CustomThrottled(wait=wait_time)
-
-        # Check long-term limit
-        if len(timestamps) >= self.long_max_requests:
-            wait_time = self.long_time_out - (now - timestamps[0])
-            raise CustomThrottled(wait=wait_time)
-
-        # Add current request timestamp and update cache
-        timestamps.append(now)
-        self.set_throttle_data(self.key, timestamps)
-        return True
-
-    def wait(self):
-        """
-        Returns the remaining time for the first valid time window.
-        """
-        if not self.key:
-            return None
-
-        now = time.time()
-        timestamps = self.get_throttle_data(self.key)
-
-        # Check remaining time for short-term limit
-        short_term_timestamps = [ts for ts in timestamps if now - ts <= self.short_time_out]
-        if len(short_term_timestamps) >= self.short_max_requests:
-            return self.short_time_out - (now - short_term_timestamps[0])
-
-        # Check remaining time for long-term limit
-        if len(timestamps) >= self.long_max_requests:
-            return self.long_time_out - (now - timestamps[0])
-
-        return None
+    get_cache_key = PhoneThrottle.get_cache_key
 
 # endregion
@@ -0,0 +1,117 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+
+
+logger = logging.getLogger(__name__)
+
+BLACKLIST_KEY = 'token_blacklist:{jti}'
+
+
+def use_redis_blacklist():
+    return settings.TOKEN_BLACKLIST['BACKEND'] == 'redis'
+
+
+def get_blacklist_key(jti):
+    return BLACKLIST_KEY.format(jti=jti)
+
+
+class RedisRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist lives in Redis: a revoked JTI is kept only
+    for the token's remaining lifetime, and issuing/refreshing/revoking a
+    token never writes to Postgres. With ``TOKEN_BLACKLIST['BACKEND']`` set
+    to ``database`` it behaves exactly like simplejwt's RefreshToken.
+    """
+
+    def check_blacklist(self):
+        if not use_redis_blacklist():
+            return super().check_blacklist()
+
+        if cache.get(get_blacklist_key(self.payload[api_settings.JTI_CLAIM])):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        if not use_redis_blacklist():
+            return super().blacklist()
+
+        remaining = int(self.payload['exp'] - time.time())
+        if remaining > 0:
+            cache.set(get_blacklist_key(self.payload[api_settings.JTI_CLAIM]), 1, timeout=remaining)
+
+    @classmethod
+    def for_user(cls, user):
+        if not use_redis_blacklist():
+            return super().for_user(user)
+
+        # Skip BlacklistMixin.for_user, which records an OutstandingToken row.
+        return super(BlacklistMixin, cls).for_user(user)
+
+
+# region Migration / Purge
+
+def migrate_blacklisted_tokens(chunk_size=1000):
+    """
+    Copies the still valid JTIs of the database blacklist into Redis, with
+    a TTL equal to their remaining lifetime.
+    :return: Number of migrated tokens.
+    """
+    from django_redis import get_redis_connection
+    redis = get_redis_connection('default')
+
+    migrated = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            BlacklistedToken.objects.filter(
+                id__gt=last_id,
+                token__expires_at__gt=timezone.now(),
+            ).order_by('id').values_list('id', 'token__jti', 'token__expires_at')[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        pipeline = redis.pipeline(transaction=False)
+        now = timezone.now()
+        for _id, jti, expires_at in chunk:
+            remaining = int((expires_at - now).total_seconds())
+            if remaining > 0:
+                pipeline.set(cache.make_key(get_blacklist_key(jti)), 1, ex=remaining)
+        pipeline.execute()
+
+        migrated += len(chunk)
+        last_id = chunk[-1][0]
+
+    return migrated
+
+
+def purge_outstanding_tokens(chunk_size=1000, expired_only=True):
+    """
+    Deletes outstanding tokens (and their blacklist rows) in chunks, so the
+    tables are never locked by one large DELETE.
+    :return: Number of deleted outstanding tokens.
+    """
+    queryset = OutstandingToken.objects.all()
+    if expired_only:
+        queryset = queryset.filter(expires_at__lte=timezone.now())
+
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[1].get(OutstandingToken._meta.label, 0)
+
+    return deleted
+
+# endregion
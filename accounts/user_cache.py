@@ -0,0 +1,84 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+
+from accounts.models import User
+from core.db_router import primary_db
+from utils import tiered_cache
+
+
+PERMISSION_VERSION_KEY = 'auth_user:permission_version'
+USER_VERSION_KEY = 'auth_user:version:{user_id}'
+
+# Loaded with the snapshot; every other field is deferred and only
+# fetched if a view actually reads it. Model.from_db expects model field order.
+SNAPSHOT_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields
+    if field.attname in {
+        'id', 'phone', 'email', 'first_name', 'last_name',
+        'is_active', 'is_admin', 'is_staff', 'is_superuser',
+    }
+)
+
+
+def get_permission_version():
+    """Bumped whenever a group's permissions change, which affects many users at once."""
+    return tiered_cache.get_or_set(PERMISSION_VERSION_KEY, time.time_ns)
+
+
+def get_user_version(user_id):
+    """Bumped (by dropping it) whenever this user, their groups or permissions change."""
+    return tiered_cache.get_or_set(USER_VERSION_KEY.format(user_id=user_id), time.time_ns)
+
+
+def get_user_cache_key(user_id):
+    return f"auth_user:{user_id}:{get_user_version(user_id)}:{get_permission_version()}"
+
+
+def build_user_snapshot(user_id):
+    # A replica may still have the row the invalidation was about.
+    with primary_db():
+        queryset = User.objects.filter(pk=user_id)
+        values = queryset.values_list(*SNAPSHOT_FIELDS).first()
+        if values is None:
+            return None
+
+        user = User.from_db(queryset.db, SNAPSHOT_FIELDS, values)
+        backend = ModelBackend()
+        return {
+            'db': queryset.db,
+            'values': values,
+            'user_permissions': backend.get_user_permissions(user),
+            'group_permissions': backend.get_group_permissions(user),
+        }
+
+
+def get_cached_user(user_id):
+    """
+    Returns the user from a compact cached snapshot, with its permission
+    caches pre-filled so ``has_perm`` needs no query either, or None if the
+    user does not exist.
+    """
+    snapshot = tiered_cache.get_or_set(
+        get_user_cache_key(user_id),
+        lambda: build_user_snapshot(user_id),
+        timeout=settings.AUTH_USER_CACHE['TIMEOUT'],
+    )
+    if snapshot is None:
+        return None
+
+    user = User.from_db(snapshot['db'], SNAPSHOT_FIELDS, snapshot['values'])
+    user._user_perm_cache = snapshot['user_permissions']
+    user._group_perm_cache = snapshot['group_permissions']
+    user._perm_cache = {*snapshot['user_permissions'], *snapshot['group_permissions']}
+    return user
+
+
+def invalidate_cached_user(*user_ids):
+    # Deferred to commit by the tiered cache; the next request reads a new version.
+    tiered_cache.invalidate(*(USER_VERSION_KEY.format(user_id=user_id) for user_id in user_ids))
+
+
+def invalidate_all_cached_users():
+    tiered_cache.invalidate(PERMISSION_VERSION_KEY)
@@ -15,23 +15,41 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.request import Request
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.pagination import LimitOffsetPagination
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
-from rest_framework_simplejwt.tokens import RefreshToken, Token
+from rest_framework_simplejwt.tokens import Token
 from rest_framework_simplejwt.views import TokenRefreshView
 
 # Local Application Imports
+from core.db_router import ReadReplicaMixin, primary_db
 from accounts.models import UserProfile, EmployeeProfile, SocialLink, User
 from accounts.docs.schema import *
 from accounts.serializers import *
 from accounts.throttles import DualThrottle
 from accounts.permissions import IsEmployeeForProfile, IsAnonymous
 from accounts.jwt import set_token_cookies, delete_token_cookies
-from accounts.tasks import send_otp_to_phone_tasks
-from utils import generate_otp_change_phone, generate_otp_auth_num, generate_otp_reset_password
+from accounts.tokens import RedisRefreshToken
+from accounts.sms import enqueue_otp
+from accounts.cache_keys import (
+    SKILLS_CACHE_KEY,
+    JOBS_CACHE_KEY,
+    TEAM_DIRECTORY_CACHE_KEY,
+    TEAM_DIRECTORY_GENERATION_KEY,
+)
+from utils import (
+    generate_otp_change_phone,
+    generate_otp_auth_num,
+    generate_otp_reset_password,
+    TieredCacheListMixin,
+    protected_cache,
+)
 
 
 
 
+TEAM_DIRECTORY_CACHE_TIMEOUT = 60 * 60
+
+
 # region Auth
 
 class BaseLoginView(APIView):
@@ -50,7 +68,7 @@ class BaseLoginView(APIView):
         response = Response(status=status.HTTP_200_OK)
 
         # Set auth cookies
-        refresh = RefreshToken.for_user(user)
+        refresh = RedisRefreshToken.for_user(user)
         set_token_cookies(response, str(refresh.access_token), str(refresh))
 
         # Rotate CSRF token
@@ -76,7 +94,7 @@ class RequestOTPView(APIView):
             created = User.objects.filter(phone=phone).exists()
 
             otp = generate_otp_auth_num(phone)
-            send_otp_to_phone_tasks.delay(otp)
+            enqueue_otp(phone, otp)
             
             data = {'created': not created,}
             
@@ -144,7 +162,7 @@ class PhoneLoginView(BaseLoginView):
 
 
 class LogoutAPIView(APIView):
-    serializer_class = TokenBlacklistSerializer
+    serializer_class = LogoutSerializer
     permission_classes = (IsAuthenticated,)
 
     @logout_docs
@@ -172,6 +190,8 @@ class LogoutAPIView(APIView):
 
 
 class RefreshTokenAPIView(TokenRefreshView):
+    serializer_class = RefreshTokenSerializer
+    
     @refresh_token_docs
     def post(self, request: Request, *args, **kwargs) -> Response:
         try:
@@ -204,29 +224,56 @@ class RefreshTokenAPIView(TokenRefreshView):
 
 # region Employee and Team
 
-# @method_decorator(cache_page(60 * 60), name='dispatch')
-class EmployeeListView(APIView):
+def build_team_directory():
+    """Serializes every completed employee profile for the list and detail pages, in one query."""
+    with primary_db():
+        profiles = list(EmployeeProfile.objects.with_directory_data())
+    
+    return {
+        'list': [dict(item) for item in EmployeeListSerializer(profiles, many=True).data],
+        'details': {profile.username: dict(EmployeeDetailSerializer(profile).data) for profile in profiles},
+    }
+
+
+def get_team_directory():
+    return protected_cache.get_or_compute(
+        TEAM_DIRECTORY_CACHE_KEY,
+        build_team_directory,
+        timeout=TEAM_DIRECTORY_CACHE_TIMEOUT,
+        generation_keys=[TEAM_DIRECTORY_GENERATION_KEY],
+    )
+
+
+class EmployeeListPagination(LimitOffsetPagination):
+    max_limit = 100
+
+
+class EmployeeListView(ReadReplicaMixin, APIView):
     serializer_class = EmployeeListSerializer
+    pagination_class = EmployeeListPagination
 
     def get(self, request):
-        queryset = EmployeeProfile.objects.filter_completed_profiles()
-        serializer = self.serializer_class(queryset, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        employees = get_team_directory()['list']
+        
+        # Paginated only when asked for (?limit=), the team page gets the full list.
+        if self.pagination_class.limit_query_param in request.query_params:
+            paginator = self.pagination_class()
+            page = paginator.paginate_queryset(employees, request, view=self)
+            return paginator.get_paginated_response(page)
+        
+        return Response(employees, status=status.HTTP_200_OK)
 
 
-# @method_decorator(cache_page(60 * 60), name='dispatch')
-class EmployeeDetailView(APIView):
+class EmployeeDetailView(ReadReplicaMixin, APIView):
     serializer_class = EmployeeDetailSerializer
 
     def get(self, request, username=None):
-        queryset = EmployeeProfile.objects.filter_completed_profiles().filter(username=username).first()
+        employee = get_team_directory()['details'].get(username)
         
-        if queryset is None:
+        if employee is None:
             return Response({"خطا": "پروفایل کارمندی یافت نشد"}, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = self.serializer_class(queryset)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(employee, status=status.HTTP_200_OK)
 
 
 # endregion
@@ -303,7 +350,7 @@ class ResetPasswordView(APIView):
             data = serializer.validated_data
             phone = data['phone']
             otp = generate_otp_reset_password(phone)
-            send_otp_to_phone_tasks.delay(otp)
+            enqueue_otp(phone, otp)
 
             if settings.DEBUG:
                 data['otp'] = otp
@@ -364,7 +411,7 @@ class ChangePhoneRequestView(APIView):
             data = serializer.validated_data
             
             otp = generate_otp_change_phone(data['phone'])
-            send_otp_to_phone_tasks.delay(otp)
+            enqueue_otp(data['phone'], otp)
             
             data = {}
             
@@ -471,14 +518,16 @@ class EmployeeSocialLinkViewSet(viewsets.ViewSet):
 
 
 # @method_decorator(cache_page(60 * 60), name='dispatch')
-class SkillListView(generics.ListAPIView):
+class SkillListView(TieredCacheListMixin, generics.ListAPIView):
     serializer_class = SkillListSerializer
+    list_cache_key = SKILLS_CACHE_KEY
     queryset = Skill.objects.filter(is_active=True)
   
 
 # @method_decorator(cache_page(60 * 60), name='dispatch')
-class JobListView(generics.ListAPIView):
+class JobListView(TieredCacheListMixin, generics.ListAPIView):
     serializer_class = JobListSerializer
+    list_cache_key = JOBS_CACHE_KEY
     queryset = Job.objects.filter(is_active=True)
 
 # endregion
@@ -1,28 +1,32 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.utils.html import format_html
 from django.urls import reverse
 from django.core.exceptions import ValidationError
-from mptt.admin import DraggableMPTTAdmin
+from django.db.models import F
+from django.db.models.functions import Coalesce
 from simple_history.admin import SimpleHistoryAdmin
 
 from .models import Comment
+from .moderation import moderate_comments
 from .forms import CommentAdminForm
 
 
-class CommentAdmin(SimpleHistoryAdmin, DraggableMPTTAdmin):
+class CommentAdmin(SimpleHistoryAdmin):
     form = CommentAdminForm
     list_display = (
-        "tree_actions", "indented_title",
+        "indented_title", "reply_count",
         "is_approved", "is_deleted"
     )
     list_filter = ("is_approved", "is_deleted", "created_at", 'user__id')
-    search_fields = ("text", "object_slug")
+    search_fields = ("text",)
     readonly_fields = (
         "created_at", "updated_at", 'approved_at', 'parent_link',
-        'approved_by', 'user', 'object_slug', 'content_type',
+        'approved_by', 'user', 'object_id', 'content_type',
         'text'
         )
-    ordering = ["tree_id", "lft"]
+    # Replies are listed (indented) under their parent, threads newest first.
+    level_indent = 20
+    actions = ["approve_comments", "reject_comments"]
     
     fieldsets = (
         (None, {
@@ -30,7 +34,7 @@ class CommentAdmin(SimpleHistoryAdmin, DraggableMPTTAdmin):
             'classes': ('wide',)
         }),
         ('ارتباط با محتوا', {
-            'fields': ('content_type', 'object_slug', 'parent_link'),
+            'fields': ('content_type', 'object_id', 'parent_link'),
         }),
         ('وضعیت تایید', {
             'fields': ('is_approved', 'approved_by'),
@@ -56,14 +60,22 @@ class CommentAdmin(SimpleHistoryAdmin, DraggableMPTTAdmin):
         return "-"
     parent_link.short_description = "والد"
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            thread_created_at=Coalesce('parent__created_at', 'created_at'),
+            thread_id=Coalesce('parent_id', 'pk'),
+        ).order_by(
+            '-thread_created_at', 'thread_id', F('parent_id').asc(nulls_first=True), 'created_at'
+        )
+    
     def indented_title(self, obj):
-        default_title = super().indented_title(obj)
         url = reverse("admin:comments_comment_change", args=[obj.pk])
         return format_html(
-            '<a href="{}" target="_self" title="{}">{}</a>',
+            '<div style="text-indent:{}px;"><a href="{}" target="_self" title="{}">{}</a></div>',
+            self.level_indent if obj.parent_id else 0,
             url,
             obj.text,
-            default_title
+            obj
         )
     indented_title.short_description = "متن نظر"
     
@@ -74,5 +86,19 @@ class CommentAdmin(SimpleHistoryAdmin, DraggableMPTTAdmin):
         obj.approved_by = request.user
         super().save_model(request, obj, form, change)
 
+    
+    @admin.action(description="تایید نظرات انتخاب شده")
+    def approve_comments(self, request, queryset):
+        updated = moderate_comments(list(queryset.values_list('pk', flat=True)), True, request.user)
+        self.message_user(request, f"{updated} نظر تایید شد.", messages.SUCCESS)
+    
+    @admin.action(description="عدم تایید نظرات انتخاب شده")
+    def reject_comments(self, request, queryset):
+        if not request.user.is_superuser:
+            self.message_user(request, "خطا: شما اجازه تغییر وضعیت به 'عدم تایید' را ندارید.", messages.ERROR)
+            return
+        updated = moderate_comments(list(queryset.values_list('pk', flat=True)), False, request.user)
+        self.message_user(request, f"{updated} نظر از حالت تایید خارج شد.", messages.SUCCESS)
+
 
 admin.site.register(Comment, CommentAdmin)
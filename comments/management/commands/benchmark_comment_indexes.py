@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from comments.models import Comment
+from comments.views import limit_replies
+from courses.models import Course
+
+
+# Ids far above the real courses, so the seeded threads never mix with real ones.
+OBJECT_ID_OFFSET = 10 ** 12
+
+SEED_TOP_LEVEL_SQL = f"""
+    INSERT INTO {Comment._meta.db_table} (
+        content_type_id, object_id, user_id, text, parent_id,
+        is_approved, is_deleted, created_at, updated_at, reply_count
+    )
+    SELECT
+        %(content_type_id)s,
+        {OBJECT_ID_OFFSET} + g %% %(courses)s,
+        %(user_id)s,
+        'benchmark comment ' || g,
+        NULL,
+        g %% 10 <> 0,
+        g %% 50 = 0,
+        now() - g * interval '1 minute',
+        now() - g * interval '1 minute',
+        0
+    FROM generate_series(1, %(top_level)s) AS g
+"""
+
+SEED_REPLIES_SQL = f"""
+    INSERT INTO {Comment._meta.db_table} (
+        content_type_id, object_id, user_id, text, parent_id,
+        is_approved, is_deleted, created_at, updated_at, reply_count
+    )
+    SELECT
+        p.content_type_id,
+        p.object_id,
+        %(user_id)s,
+        'benchmark reply ' || g,
+        p.id,
+        g %% 10 <> 0,
+        g %% 50 = 0,
+        p.created_at + g * interval '1 second',
+        p.created_at + g * interval '1 second',
+        0
+    FROM generate_series(1, %(replies)s) AS g
+    JOIN (
+        SELECT id, content_type_id, object_id, created_at,
+               row_number() OVER (ORDER BY id) AS rn
+        FROM {Comment._meta.db_table}
+        WHERE id > %(id_offset)s
+    ) AS p ON p.rn = g %% %(top_level)s + 1
+"""
+
+UPDATE_REPLY_COUNT_SQL = f"""
+    UPDATE {Comment._meta.db_table} AS c
+    SET reply_count = r.count
+    FROM (
+        SELECT parent_id, count(*) AS count
+        FROM {Comment._meta.db_table}
+        WHERE id > %(id_offset)s AND parent_id IS NOT NULL AND is_approved AND NOT is_deleted
+        GROUP BY parent_id
+    ) AS r
+    WHERE c.id = r.parent_id
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a large comment set (1M rows across thousands of courses by default) "
+        "and prints the plans of the comment thread queries without and with the "
+        "partial thread indexes. Everything runs in one transaction that is rolled "
+        "back; dropping the indexes locks the comments table until then, so run it "
+        "against a benchmark copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--courses', type=int, default=5000)
+        parser.add_argument(
+            '--reply-ratio',
+            type=float,
+            default=0.3,
+            help="Share of the seeded comments that are replies.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['comments'], options['courses'], options['reply_ratio'])
+
+            top_level, replies = self.get_thread_querysets()
+
+            sid = transaction.savepoint()
+            with connection.schema_editor() as schema_editor:
+                for index in Comment._meta.indexes:
+                    schema_editor.remove_index(Comment, index)
+            self.explain("Without thread indexes", top_level, replies)
+            transaction.savepoint_rollback(sid)
+
+            self.explain("With thread indexes", top_level, replies)
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark rows rolled back."))
+
+    def seed(self, total, courses, reply_ratio):
+        replies = int(total * reply_ratio)
+        top_level = total - replies
+
+        user = get_user_model().objects.order_by('pk').first()
+        if user is None:
+            user = get_user_model().objects.create_user(phone='+989000000000')
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {Comment._meta.db_table}")
+            id_offset = cursor.fetchone()[0]
+
+            params = {
+                'content_type_id': ContentType.objects.get_for_model(Course).pk,
+                'user_id': user.pk,
+                'courses': courses,
+                'top_level': top_level,
+                'replies': replies,
+                'id_offset': id_offset,
+            }
+            cursor.execute(SEED_TOP_LEVEL_SQL, params)
+            cursor.execute(SEED_REPLIES_SQL, params)
+            cursor.execute(UPDATE_REPLY_COUNT_SQL, params)
+            cursor.execute(f"ANALYZE {Comment._meta.db_table}")
+
+        self.stdout.write(f"Seeded {top_level} comments and {replies} replies on {courses} courses.")
+
+    def get_thread_querysets(self):
+        """The same filters and ordering as ``CommentViewSet`` for an anonymous user."""
+        base_queryset = Comment.objects.filter(
+            content_type=ContentType.objects.get_for_model(Course),
+            object_id=OBJECT_ID_OFFSET + 1,
+            is_approved=True,
+            is_deleted=False,
+        )
+        top_level = base_queryset.filter(parent=None).order_by('-created_at')[:50]
+        replies = limit_replies(
+            base_queryset.filter(parent__in=list(top_level.values_list('pk', flat=True))),
+            F('created_at').desc(),
+        )
+        return top_level, replies
+
+    def explain(self, title, top_level, replies):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write("Top-level comments:")
+        self.stdout.write(top_level.explain(analyze=True, buffers=True))
+        self.stdout.write("Replies:")
+        self.stdout.write(replies.explain(analyze=True, buffers=True))
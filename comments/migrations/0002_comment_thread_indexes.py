@@ -0,0 +1,27 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:04
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the indexes without locking the comments table.
+    atomic = False
+
+    dependencies = [
+        ('comments', '0001_initial'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_deleted', False), ('parent__isnull', True)), fields=['content_type', 'object_slug', '-created_at'], name='comment_thread_top_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_deleted', False), ('parent__isnull', False)), fields=['parent', '-created_at'], name='comment_thread_replies_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.1.7 on 2026-10-19 08:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_reply_count(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    replies = Comment.objects.filter(
+        parent=OuterRef('pk'),
+        is_approved=True,
+        is_deleted=False,
+    ).order_by().values('parent').annotate(count=Count('pk')).values('count')
+    Comment.objects.filter(parent=None).update(reply_count=Coalesce(Subquery(replies), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_comment_thread_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='comment',
+            name='level',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='lft',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='rght',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='tree_id',
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='تعداد پاسخ های تایید شده و حذف نشده؛ توسط سیگنال ها به روز می شود.', verbose_name='تعداد پاسخ ها'),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='replies', to='comments.comment', verbose_name='والد'),
+        ),
+        migrations.AlterField(
+            model_name='historicalcomment',
+            name='parent',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='comments.comment', verbose_name='والد'),
+        ),
+        migrations.RunPython(backfill_reply_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Concat
+
+
+def resolve_object_ids(apps, model):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for content_type in ContentType.objects.filter(pk__in=model.objects.values('content_type')):
+        try:
+            related_model = apps.get_model(content_type.app_label, content_type.model)
+        except LookupError:
+            continue
+
+        # Soft-deleted objects got a "-del" suffix on their slug.
+        by_slug = related_model.objects.filter(slug=OuterRef('object_slug')).values('pk')[:1]
+        by_deleted_slug = related_model.objects.filter(
+            slug=Concat(OuterRef('object_slug'), Value('-del'))
+        ).values('pk')[:1]
+        model.objects.filter(content_type=content_type, object_id=None).update(
+            object_id=Coalesce(Subquery(by_slug), Subquery(by_deleted_slug))
+        )
+
+
+def backfill_object_id(apps, schema_editor):
+    Comment = apps.get_model('comments', 'Comment')
+    HistoricalComment = apps.get_model('comments', 'HistoricalComment')
+
+    resolve_object_ids(apps, Comment)
+    # Comments whose object's slug changed since can no longer be resolved.
+    Comment.objects.filter(object_id=None).delete()
+
+    resolve_object_ids(apps, HistoricalComment)
+    HistoricalComment.objects.filter(object_id=None).update(
+        object_id=Subquery(Comment.objects.filter(pk=OuterRef('id')).values('object_id')[:1])
+    )
+    HistoricalComment.objects.filter(object_id=None).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_adjacency_replies'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='object_id',
+            field=models.PositiveBigIntegerField(null=True, verbose_name='شناسه شی'),
+        ),
+        migrations.AddField(
+            model_name='historicalcomment',
+            name='object_id',
+            field=models.PositiveBigIntegerField(null=True, verbose_name='شناسه شی'),
+        ),
+        migrations.RunPython(backfill_object_id, migrations.RunPython.noop),
+    ]
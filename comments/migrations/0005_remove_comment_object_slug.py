@@ -0,0 +1,33 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0004_comment_object_id'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_thread_top_idx',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='object_slug',
+        ),
+        migrations.RemoveField(
+            model_name='historicalcomment',
+            name='object_slug',
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='object_id',
+            field=models.PositiveBigIntegerField(verbose_name='شناسه شی'),
+        ),
+        migrations.AlterField(
+            model_name='historicalcomment',
+            name='object_id',
+            field=models.PositiveBigIntegerField(verbose_name='شناسه شی'),
+        ),
+    ]
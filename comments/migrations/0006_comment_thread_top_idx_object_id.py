@@ -0,0 +1,18 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking the comments table.
+    atomic = False
+
+    dependencies = [
+        ('comments', '0005_remove_comment_object_slug'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('is_approved', True), ('is_deleted', False), ('parent__isnull', True)), fields=['content_type', 'object_id', '-created_at'], name='comment_thread_top_idx'),
+        ),
+    ]
@@ -4,18 +4,18 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from mptt.models import MPTTModel, TreeForeignKey
-from simple_history.models import HistoricalRecords
 
+from utils.history import BufferedHistoricalRecords
 
-class Comment(MPTTModel):
+
+class Comment(models.Model):
     content_type = models.ForeignKey(
         ContentType, on_delete=models.CASCADE,
         related_name='comments',
         verbose_name=_("نوع محتوا")
     )
-    object_slug = models.CharField(max_length=255, verbose_name=_("اسلاگ شی"))
-    content_object = GenericForeignKey(ct_field="content_type", fk_field="object_slug")
+    object_id = models.PositiveBigIntegerField(verbose_name=_("شناسه شی"))
+    content_object = GenericForeignKey(ct_field="content_type", fk_field="object_id")
     
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -31,13 +31,20 @@ class Comment(MPTTModel):
         verbose_name=_('تایید شده توسط')
     )
     text = models.TextField(verbose_name=_("متن نظر"))
-    parent = TreeForeignKey(
+    # Replies are one level deep, so a plain parent link is enough.
+    parent = models.ForeignKey(
         'self', on_delete=models.CASCADE,
         null=True, blank=True,
         related_name='replies',
         verbose_name=_('والد')
     )
-    history = HistoricalRecords(excluded_fields=['lft', 'rght', 'tree_id', 'level'])
+    reply_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name=_('تعداد پاسخ ها'),
+        help_text=_("تعداد پاسخ های تایید شده و حذف نشده؛ توسط سیگنال ها به روز می شود.")
+    )
+    history = BufferedHistoricalRecords(excluded_fields=['reply_count'])
     is_approved = models.BooleanField(default=False, verbose_name=_("تایید شده"))
     is_deleted = models.BooleanField(default=False, verbose_name=_('وضعیت حذف'))
     approved_at = models.DateTimeField(null=True, blank=True, verbose_name=_("تاریخ تایید"))
@@ -55,17 +62,17 @@ class Comment(MPTTModel):
         
         ALLOWED_COMMENT_MODELS = ["article", "course"]
         
-        if self.content_type and self.object_slug:
+        if self.content_type and self.object_id:
             related_model = self.content_type.model_class()
             
             if related_model._meta.model_name.lower() not in ALLOWED_COMMENT_MODELS:
                 raise ValidationError(_("این مدل اجازه‌ی دریافت کامنت را ندارد."))
             
             if not related_model.objects.filter(
-                slug=self.object_slug, is_published=True,
+                pk=self.object_id, is_published=True,
                 is_deleted=False).exists():
                 raise ValidationError(
-                    _("شی مرتبط با این اسلاگ در مدل وجود ندارد.")
+                    _("شی مرتبط با این شناسه در مدل وجود ندارد.")
                 )
         
         if self.parent is not None:
@@ -74,9 +81,12 @@ class Comment(MPTTModel):
                     _("فقط می‌توان به کامنت‌های تأیید شده پاسخ داد.")
                 )
             
-            if self.parent.object_slug != self.object_slug:
+            if (
+                self.parent.content_type_id != self.content_type_id
+                or self.parent.object_id != self.object_id
+            ):
                 raise ValidationError(
-                    _("اسلاگ ها باید برابر باشد.")
+                    _("پاسخ باید به همان محتوای والد تعلق داشته باشد.")
                 )
 
             if self.parent.parent is not None:
@@ -88,9 +98,20 @@ class Comment(MPTTModel):
         self.clean()
         super().save(*args, **kwargs)
     
-    class MPTTMeta:
-        order_insertion_by = ['created_at']
-
     class Meta:
         verbose_name = _("نظر")
         verbose_name_plural = _("نظرات")
+        indexes = [
+            # Top-level comments of one object, newest first (CommentViewSet).
+            models.Index(
+                fields=['content_type', 'object_id', '-created_at'],
+                condition=models.Q(parent__isnull=True, is_approved=True, is_deleted=False),
+                name='comment_thread_top_idx',
+            ),
+            # Replies prefetched for a page of top-level comments.
+            models.Index(
+                fields=['parent', '-created_at'],
+                condition=models.Q(parent__isnull=False, is_approved=True, is_deleted=False),
+                name='comment_thread_replies_idx',
+            ),
+        ]
@@ -0,0 +1,74 @@
+from collections import Counter
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from utils import counter_buffer, history_buffer
+from .models import Comment
+from .thread_cache import bump_thread_generation
+
+
+def moderate_comments(comment_ids, approve, moderator):
+    """
+    Approves (or rejects) many comments in one transaction without the
+    per-row signals: one UPDATE for the comments, one bulk insert of their
+    history rows, one UPDATE for the ``reply_count`` of their parents and
+    one buffered ``count_comments`` delta per commented object.
+    Returns the number of comments whose state changed.
+    """
+    now = timezone.now()
+
+    with transaction.atomic():
+        comments = list(
+            Comment.objects.select_for_update().filter(pk__in=comment_ids).exclude(is_approved=approve)
+        )
+        if not comments:
+            return 0
+
+        Comment.objects.filter(pk__in=[comment.pk for comment in comments]).update(
+            is_approved=approve,
+            approved_by=moderator,
+            approved_at=Coalesce('approved_at', Value(now)) if approve else F('approved_at'),
+            updated_at=now,
+        )
+
+        for comment in comments:
+            comment.is_approved = approve
+            comment.approved_by = moderator
+            comment.updated_at = now
+            if approve and not comment.approved_at:
+                comment.approved_at = now
+
+        history_buffer.bulk_history_create(
+            Comment,
+            comments,
+            update=True,
+            default_user=moderator,
+            default_date=now,
+        )
+
+        adjustment = 1 if approve else -1
+
+        reply_deltas = Counter(
+            comment.parent_id for comment in comments
+            if comment.parent_id is not None and not comment.is_deleted
+        )
+        if reply_deltas:
+            Comment.objects.filter(pk__in=reply_deltas).update(
+                reply_count=F('reply_count') + Case(
+                    *(When(pk=parent_id, then=Value(adjustment * count)) for parent_id, count in reply_deltas.items()),
+                    output_field=IntegerField(),
+                )
+            )
+
+        deltas = Counter((comment.content_type_id, comment.object_id) for comment in comments)
+        for (content_type_id, object_id), count in deltas.items():
+            related_model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if related_model:
+                counter_buffer.add(related_model, object_id, 'count_comments', adjustment * count)
+            bump_thread_generation(content_type_id, object_id)
+
+    return len(comments)
@@ -1,34 +1,43 @@
 from rest_framework import serializers
-from rest_framework.exceptions import NotAuthenticated
-from django.core.exceptions import ValidationError
+from rest_framework.exceptions import NotAuthenticated, NotFound
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from django.contrib.contenttypes.models import ContentType
 
+from utils import get_content_type, get_object_id
 from .models import Comment
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    user_avatar = serializers.ImageField(source='user.user_profile.avatar_thumbnail', read_only=True)
+    user_avatar = serializers.SerializerMethodField()
     user = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
     model_type = serializers.CharField(required=True, write_only=True)
+    object_slug = serializers.CharField(max_length=255, write_only=True)
     
     class Meta:
         model = Comment
         fields = (
             'id' , 'user', 'text','parent',
             'created_at', 'user_avatar',
-            'replies',
+            'replies', 'reply_count',
             'model_type', 'object_slug'
         )
-        extra_kwargs = {
-            'object_slug': {'write_only': True},
-        }
     
+    def get_user_avatar(self, obj):
+        # Precomputed by accounts.tasks.generate_avatar_thumbnail; resolving the
+        # ImageSpecField here would hit the storage for every comment. Kept
+        # relative: cached thread pages are shared across hosts, the views make
+        # it absolute per response (see comments.views.with_absolute_avatars).
+        user_profile = getattr(obj.user, 'user_profile', None)
+        if user_profile is None or not user_profile.avatar_thumbnail_url:
+            return None
+        return user_profile.avatar_thumbnail_url
+
     def get_replies(self, obj):
         replies = getattr(obj, 'prefetched_replies', [])
-        return CommentSerializer(replies, many=True).data
+        return CommentSerializer(replies, many=True, context=self.context).data
     
     def get_user(self, obj):
         first_name = obj.user.first_name or ''
@@ -45,15 +54,22 @@ class CommentSerializer(serializers.ModelSerializer):
         if not user.is_authenticated:
             raise NotAuthenticated((_("اطلاعات برای اعتبارسنجی ارسال نشده است.")))
         
-        content_type = get_object_or_404(ContentType, model=content_type)
+        try:
+            content_type = get_content_type(content_type)
+        except ContentType.DoesNotExist:
+            raise NotFound()
         model_class = content_type.model_class()
         
-        object_slug = validated_data.get('object_slug')
+        try:
+            object_id = get_object_id(content_type, validated_data.pop('object_slug'))
+        except ObjectDoesNotExist:
+            raise serializers.ValidationError(_("آیتم یافت نشد."))
+        
         parent_object = model_class.objects.filter(
-            slug=object_slug,
+            pk=object_id,
             is_published=True,
             is_deleted=False
-        ).first()
+        ).exists()
 
         if not parent_object:
             raise serializers.ValidationError(_("آیتم یافت نشد."))
@@ -61,7 +77,8 @@ class CommentSerializer(serializers.ModelSerializer):
         comment = Comment(
             **validated_data,
             user=user,
-            content_type=content_type
+            content_type=content_type,
+            object_id=object_id,
         )
         
         try:
@@ -73,3 +90,12 @@ class CommentSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({"error": str(e)})
         
         return comment
+
+
+class CommentModerationSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+    action = serializers.ChoiceField(choices=['approve', 'reject'])
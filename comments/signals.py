@@ -1,23 +1,35 @@
 from django.utils import timezone
-from django.db.models.signals import pre_save, post_delete
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.db.models import F
 from django.dispatch import receiver
+from courses.models import Course
+from utils import counter_buffer
 from .models import Comment
+from .thread_cache import bump_thread_generation
 
 
 def update_comment_count(instance, increment=True):
     related_model = instance.content_type.model_class()
     if related_model:
         adjustment = 1 if increment else -1
-        related_model.objects.filter(slug=instance.object_slug).update(
-            count_comments=F('count_comments') + adjustment
-        )
+        counter_buffer.add(related_model, instance.object_id, 'count_comments', adjustment)
+
+
+def is_visible(comment):
+    return comment.is_approved and not comment.is_deleted
+
+
+def update_reply_count(parent_id, adjustment):
+    Comment.objects.filter(pk=parent_id).update(reply_count=F('reply_count') + adjustment)
 
 
 @receiver(pre_save, sender=Comment)
 def handle_approval_change_pre_save(sender, instance, **kwargs):
     if instance.pk:
         previous_instance = Comment.objects.get(pk=instance.pk)
+        instance._was_approved = previous_instance.is_approved
+        instance._was_visible = is_visible(previous_instance)
 
         if previous_instance.is_approved is False and instance.is_approved is True:
             update_comment_count(instance, increment=True)
@@ -50,3 +62,34 @@ def set_approved_at(sender, instance, **kwargs):
         and not old.approved_at
     ):
         instance.approved_at = timezone.now()
+
+
+@receiver(post_save, sender=Comment)
+def update_reply_count_on_save(sender, instance, **kwargs):
+    if instance.parent_id is None:
+        return
+    
+    was_visible = getattr(instance, '_was_visible', False)
+    if was_visible != is_visible(instance):
+        update_reply_count(instance.parent_id, -1 if was_visible else 1)
+
+
+@receiver(post_delete, sender=Comment)
+def update_reply_count_on_delete(sender, instance, **kwargs):
+    if instance.parent_id is not None and is_visible(instance):
+        update_reply_count(instance.parent_id, -1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_comment_thread_generation(sender, instance, **kwargs):
+    # Pending comments are not part of the cached thread pages.
+    if instance.is_approved or getattr(instance, '_was_approved', False):
+        bump_thread_generation(instance.content_type_id, instance.object_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_thread_generation(sender, instance, **kwargs):
+    # e.g. an unpublished course must stop serving its cached thread.
+    bump_thread_generation(ContentType.objects.get_for_model(Course).pk, instance.pk)
@@ -0,0 +1,32 @@
+from utils import protected_cache
+from .models import Comment
+
+
+COMMENT_THREAD_CACHE_KEY = 'comments:thread:{content_type}:{object_id}:{page_size}'
+COMMENT_THREAD_GENERATION_KEY = 'comments:generation:{content_type}:{object_id}'
+COMMENT_THREAD_CACHE_TIMEOUT = 60 * 5
+# Only the first pages of a thread are cached, deeper cursors are read from the database.
+COMMENT_THREAD_CACHED_PAGES = 3
+
+
+def get_thread_cache_key(content_type_id, object_id, page_size):
+    return COMMENT_THREAD_CACHE_KEY.format(content_type=content_type_id, object_id=object_id, page_size=page_size)
+
+
+def get_thread_generation_key(content_type_id, object_id):
+    return COMMENT_THREAD_GENERATION_KEY.format(content_type=content_type_id, object_id=object_id)
+
+
+def bump_thread_generation(content_type_id, *object_ids):
+    """Marks the cached thread pages of these objects as stale, after commit."""
+    protected_cache.bump_generation(
+        *(get_thread_generation_key(content_type_id, object_id) for object_id in object_ids)
+    )
+
+
+def bump_user_threads(user_id):
+    """Marks stale every cached thread showing a comment of this user, e.g. after an avatar change."""
+    objects = Comment.objects.filter(user_id=user_id).order_by().values_list('content_type_id', 'object_id').distinct()
+    protected_cache.bump_generation(
+        *(get_thread_generation_key(content_type_id, object_id) for content_type_id, object_id in objects)
+    )
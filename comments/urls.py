@@ -14,6 +14,16 @@ urlpatterns = [
         views.CommentViewSet.as_view({'delete': 'destroy'}),
         name='comments-create'
     ),
+    path(
+        'moderate/',
+        views.CommentModerationView.as_view(),
+        name='comments-moderate'
+    ),
+    path(
+        'replies/<int:pk>/',
+        views.CommentReplyListView.as_view(),
+        name='comments-replies'
+    ),
     re_path(
         r'^(?P<type>[\w\-]+)/(?P<slug>[\w\-\u0600-\u06FF]+)/?$',
         views.CommentViewSet.as_view({'get': 'list'}),
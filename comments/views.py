@@ -1,14 +1,56 @@
-from rest_framework import status, viewsets
+import copy
+from urllib.parse import parse_qs, urlparse
+
+from rest_framework import generics, status, viewsets
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.pagination import CursorPagination
-from django.core.exceptions import ValidationError
-from django.db.models import Prefetch, Case, When, IntegerField, Value, Exists, OuterRef, Q
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from django.http import QueryDict
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db.models import Prefetch, Case, When, IntegerField, Value, Q, F, Window
+from django.db.models.functions import Coalesce, RowNumber
 from django.utils.translation import gettext_lazy as _
 from django.utils.functional import cached_property
 from django.contrib.contenttypes.models import ContentType
 
+from core.db_router import ReadReplicaMixin, primary_db
+from utils import get_content_type, get_object_id, protected_cache
 from .serializers import *
 from .models import Comment
+from .moderation import moderate_comments
+from .thread_cache import (
+    COMMENT_THREAD_CACHE_TIMEOUT,
+    COMMENT_THREAD_CACHED_PAGES,
+    get_thread_cache_key,
+    get_thread_generation_key,
+)
+
+
+# Newest replies embedded per top-level comment, the rest are paged by CommentReplyListView.
+COMMENT_REPLY_LIMIT = 3
+
+
+def limit_replies(replies_queryset, *ordering):
+    """Keeps the first ``COMMENT_REPLY_LIMIT`` replies of every parent, in ``ordering``."""
+    return replies_queryset.annotate(
+        reply_rank=Window(RowNumber(), partition_by=F('parent_id'), order_by=ordering),
+    ).filter(reply_rank__lte=COMMENT_REPLY_LIMIT).order_by(*ordering)
+
+
+def with_absolute_avatars(request, comments):
+    """Serialized comments (and their embedded replies) with ``user_avatar`` absolute for this request."""
+    return [
+        {
+            **comment,
+            'user_avatar': request.build_absolute_uri(comment['user_avatar']) if comment['user_avatar'] else None,
+            'replies': with_absolute_avatars(request, comment['replies']),
+        }
+        for comment in comments
+    ]
 
 
 class CommentListPagination(CursorPagination):
@@ -20,9 +62,24 @@ class CommentListPagination(CursorPagination):
         if queryset.query.order_by:
             return queryset.query.order_by
         return super().get_ordering(request, queryset, view)
+    
+    def get_cursor_param(self, url):
+        """The raw cursor of a pagination link, or None if there is no link."""
+        if not url:
+            return None
+        return parse_qs(urlparse(url).query).get(self.cursor_query_param, [''])[0]
+    
+    def get_cursor_link(self, request, cursor):
+        """The link to the page at a raw cursor, built for this request ('' is the first page)."""
+        if cursor is None:
+            return None
+        url = request.build_absolute_uri()
+        if not cursor:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ReadReplicaMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
     pagination_class = CommentListPagination
     
@@ -32,20 +89,25 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not model_type:
             raise ValidationError(_("پارامترها الزامی هستند."))
         try:
-            return ContentType.objects.get(model=model_type)
+            return get_content_type(model_type)
         except ContentType.DoesNotExist:
             raise ValidationError(_("مدل یافت نشد."))
     
-    def get_queryset(self):
+    @cached_property
+    def object_id(self):
         object_slug = self.kwargs.get('slug')
-        
         if not object_slug:
             raise ValidationError(_("پارامترها الزامی هستند."))
-        
+        try:
+            return get_object_id(self.content_type, object_slug)
+        except ObjectDoesNotExist:
+            raise ValidationError(_("این آیتم حذف شده یا منتشر نشده است."))
+    
+    def get_queryset(self):
         model_class = self.content_type.model_class()
         
         parent_object = model_class.objects.filter(
-            slug=object_slug,
+            pk=self.object_id,
             is_published=True,
             is_deleted=False,
         ).exists()
@@ -53,54 +115,145 @@ class CommentViewSet(viewsets.ModelViewSet):
         if not parent_object:
             raise ValidationError(_("این آیتم حذف شده یا منتشر نشده است.")) 
         
+        # The same for every visitor; the user's own comments are merged in list().
         base_queryset = Comment.objects.filter(
             content_type=self.content_type,
-            object_slug=object_slug,
+            object_id=self.object_id,
             is_approved=True,
             is_deleted=False,
         ).select_related('user__user_profile')
         
-        top_queryset = base_queryset.filter(parent=None)
         replies_queryset = base_queryset.exclude(parent=None)
         
+        return base_queryset.filter(parent=None).order_by('-created_at').prefetch_related(
+            Prefetch(
+                'replies',
+                queryset=limit_replies(replies_queryset, F('created_at').desc()),
+                to_attr='prefetched_replies'
+            )
+        )
+    
+    def get_user_queryset(self):
+        """
+        The user's own top-level comments (pending ones included) and the
+        comments they replied to, found through the user's comments on this
+        object only.
+        """
+        user = self.request.user
         
-        if self.request.user.is_authenticated:
-            top_queryset = top_queryset.annotate(
-                replied_by_user=Exists(
-                    Comment.objects.filter(
-                        parent=OuterRef('pk'),
-                        user=self.request.user
-                    )
-                )
-            ).annotate(
-                user_priority=Case(
-                    When(Q(user=self.request.user) | Q(replied_by_user=True), then=Value(1)),
-                    default=Value(0),
-                    output_field=IntegerField()
-                )
-            ).order_by('-user_priority', '-created_at')
-            
-            replies_queryset = replies_queryset.annotate(
-                user_priority=Case(
-                    When(user=self.request.user, then=Value(1)),
-                    default=Value(0),
-                    output_field=IntegerField()
-                )
-            ).order_by('-user_priority', '-created_at')
-        else:
-            top_queryset = top_queryset.order_by('-created_at')
-            replies_queryset = replies_queryset.order_by('-created_at')
-        
-         
-        top_queryset = top_queryset.prefetch_related(
+        thread_ids = Comment.objects.filter(
+            content_type=self.content_type,
+            object_id=self.object_id,
+            user=user,
+            is_deleted=False,
+        ).values(thread_id=Coalesce('parent_id', 'pk'))
+        
+        replies_queryset = Comment.objects.filter(
+            Q(is_approved=True) | Q(user=user),
+            is_deleted=False,
+        ).select_related('user__user_profile').annotate(
+            user_priority=Case(
+                When(user=user, then=Value(1)),
+                default=Value(0),
+                output_field=IntegerField()
+            )
+        )
+        
+        return Comment.objects.filter(
+            Q(is_approved=True) | Q(user=user),
+            pk__in=thread_ids,
+            parent=None,
+            is_deleted=False,
+        ).select_related('user__user_profile').order_by('-created_at').prefetch_related(
             Prefetch(
                 'replies',
-                queryset=replies_queryset,
+                queryset=limit_replies(replies_queryset, F('user_priority').desc(), F('created_at').desc()),
                 to_attr='prefetched_replies'
             )
         )
+    
+    def get_cursor_request(self, cursor):
+        """
+        A request for another page of the thread that only keeps what the
+        paginator reads, so nothing of the current request gets cached.
+        """
+        http_request = copy.copy(self.request._request)
+        http_request.GET = QueryDict(mutable=True)
+        page_size = self.request.query_params.get(self.paginator.page_size_query_param)
+        if page_size:
+            http_request.GET[self.paginator.page_size_query_param] = page_size
+        if cursor:
+            http_request.GET[self.paginator.cursor_query_param] = cursor
+        return Request(http_request)
+    
+    def get_raw_page(self, paginator, page):
+        """A serialized page with the raw cursors of its neighbours instead of links."""
+        return {
+            'next': paginator.get_cursor_param(paginator.get_next_link()),
+            'previous': paginator.get_cursor_param(paginator.get_previous_link()),
+            'results': self.get_serializer(page, many=True).data,
+        }
+    
+    def build_thread_pages(self):
+        """
+        The first pages of the thread, keyed by their cursor ('' for the
+        first one). Links are host- and query-dependent, so only the raw
+        cursors are cached and list() builds the links per request.
+        """
+        pages = {}
+        cursor = ''
+        
+        # Fill from the primary so a lagging replica never gets cached.
+        with primary_db():
+            queryset = self.get_queryset()
+            for _page in range(COMMENT_THREAD_CACHED_PAGES):
+                paginator = self.pagination_class()
+                page = paginator.paginate_queryset(queryset, self.get_cursor_request(cursor), view=self)
+                pages[cursor] = self.get_raw_page(paginator, page)
+                
+                cursor = pages[cursor]['next']
+                if cursor is None:
+                    break
+        
+        return pages
+    
+    def get_thread_page(self, request):
+        cursor = request.query_params.get(self.paginator.cursor_query_param, '')
+        
+        pages = protected_cache.get_or_compute(
+            get_thread_cache_key(self.content_type.pk, self.object_id, self.paginator.get_page_size(request)),
+            self.build_thread_pages,
+            timeout=COMMENT_THREAD_CACHE_TIMEOUT,
+            generation_keys=[get_thread_generation_key(self.content_type.pk, self.object_id)],
+        )
+        if cursor in pages:
+            return pages[cursor]
+        
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_raw_page(self.paginator, page)
+    
+    def list(self, request, *args, **kwargs):
+        data = self.get_thread_page(request)
         
-        return top_queryset
+        # The user's threads (with their pending comments) come once, next to
+        # the first page; ``results`` stays the shared page so every page keeps
+        # its size and its cursor. Approved threads also appear in ``results``.
+        data = {
+            'next': self.paginator.get_cursor_link(request, data['next']),
+            'previous': self.paginator.get_cursor_link(request, data['previous']),
+            'results': with_absolute_avatars(request, data['results']),
+        }
+        is_first_page = not request.query_params.get(self.paginator.cursor_query_param)
+        if request.user.is_authenticated and is_first_page:
+            user_comments = self.get_serializer(self.get_user_queryset(), many=True).data
+            data['user_comments'] = with_absolute_avatars(request, user_comments)
+        
+        return Response(data, status=status.HTTP_200_OK)
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.data = with_absolute_avatars(request, [response.data])[0]
+        return response
 
     def destroy(self, request, *args, **kwargs):
         object_id = kwargs.get('pk')
@@ -122,3 +275,51 @@ class CommentViewSet(viewsets.ModelViewSet):
         comment.is_deleted = True
         comment.save()
         return Response({"message": "کامنت با موفقیت حذف شد."}, status=status.HTTP_204_NO_CONTENT)
+
+
+class CommentReplyListPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = '-created_at'
+
+
+class CommentReplyListView(ReadReplicaMixin, generics.ListAPIView):
+    """All replies of one top-level comment, newest first (the thread only embeds a few)."""
+    serializer_class = CommentSerializer
+    pagination_class = CommentReplyListPagination
+    
+    def get_queryset(self):
+        parent = get_object_or_404(
+            Comment,
+            pk=self.kwargs['pk'],
+            parent=None,
+            is_approved=True,
+            is_deleted=False,
+        )
+        
+        visible = Q(is_approved=True)
+        if self.request.user.is_authenticated:
+            visible |= Q(user=self.request.user)
+        
+        return parent.replies.filter(visible, is_deleted=False).select_related('user__user_profile')
+    
+    def get_paginated_response(self, data):
+        return super().get_paginated_response(with_absolute_avatars(self.request, data))
+
+
+class CommentModerationView(APIView):
+    """Approves or rejects a batch of comments in one transaction."""
+    permission_classes = [IsAdminUser]
+    
+    def post(self, request):
+        serializer = CommentModerationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        approve = serializer.validated_data['action'] == 'approve'
+        
+        # Same rule as CommentAdmin.save_model.
+        if not approve and not request.user.is_superuser:
+            raise PermissionDenied(_("شما اجازه تغییر وضعیت به 'عدم تایید' را ندارید."))
+        
+        updated = moderate_comments(serializer.validated_data['ids'], approve, request.user)
+        return Response({"updated": updated}, status=status.HTTP_200_OK)
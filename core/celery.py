@@ -1,9 +1,27 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 app = Celery('core')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+# utils is not an app, register its tasks explicitly.
+app.autodiscover_tasks(['utils'])
+
+
+@worker_process_init.connect
+def reset_db_connection_pools(**kwargs):
+    # Each prefork child builds its own connection pool on first use.
+    from core.db_pool import discard_inherited_connections
+    discard_inherited_connections()
+
+
+@worker_ready.connect
+def flush_write_behind_buffers(**kwargs):
+    # Applies what a flush killed with the previous worker left in its processing key/list.
+    from utils.tasks import flush_counter_buffer, flush_history_buffer
+    flush_counter_buffer.delay()
+    flush_history_buffer.delay()
@@ -0,0 +1,59 @@
+from django.db import connections
+
+
+def get_pool_stats():
+    """
+    Returns the connection pool metrics of the current process per database
+    alias, including the average time requests waited for a connection and
+    the pool saturation (share of the maximum size that is checked out).
+    """
+    stats = {}
+
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is None:
+            continue
+        if pool.closed:
+            # Pools open lazily on the first query of the process.
+            stats[alias] = {'opened': False}
+            continue
+
+        pool_stats = pool.get_stats()
+        pool_max = pool_stats.get('pool_max') or pool.max_size
+        in_use = pool_stats.get('pool_size', 0) - pool_stats.get('pool_available', 0)
+        queued = pool_stats.get('requests_queued', 0)
+
+        stats[alias] = {
+            'opened': True,
+            **pool_stats,
+            'in_use': in_use,
+            'saturation': round(in_use / pool_max, 3) if pool_max else 0,
+            'avg_wait_ms': round(pool_stats.get('requests_wait_ms', 0) / queued, 2) if queued else 0,
+        }
+
+    return stats
+
+
+# Pools and connections a forked child inherited from its parent. They are
+# kept referenced so they are never closed or garbage collected in the
+# child: both would end the parent's sessions over the shared sockets.
+_inherited_from_parent = []
+
+
+def discard_inherited_connections():
+    """
+    Used right after fork: forgets the connections and pools inherited from
+    the parent without closing them, so the child opens its own pool on its
+    first query and never touches the parent's sockets.
+    """
+    for alias in connections:
+        connection = connections[alias]
+        if connection.connection is not None:
+            _inherited_from_parent.append(connection.connection)
+            connection.connection = None
+
+        # Pools are stored per backend class, shared by every alias using it.
+        pools = getattr(type(connection), '_connection_pools', None)
+        if pools:
+            _inherited_from_parent.extend(pools.values())
+            pools.clear()
@@ -0,0 +1,80 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+
+_read_only = ContextVar('db_read_only', default=False)
+_pinned_to_primary = ContextVar('db_pinned_to_primary', default=False)
+
+
+def mark_read_only(value=True):
+    return _read_only.set(value)
+
+
+def pin_to_primary(value=True):
+    return _pinned_to_primary.set(value)
+
+
+def reset_routing_state(read_only_token=None, pinned_token=None):
+    if read_only_token is not None:
+        _read_only.reset(read_only_token)
+    if pinned_token is not None:
+        _pinned_to_primary.reset(pinned_token)
+
+
+@contextmanager
+def primary_db():
+    """Reads inside the block go to the primary, e.g. when filling a shared cache."""
+    token = pin_to_primary()
+    try:
+        yield
+    finally:
+        reset_routing_state(pinned_token=token)
+
+
+def should_use_replica():
+    return _read_only.get() and not _pinned_to_primary.get()
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads of requests marked as read-only to one of the replicas in
+    ``settings.READ_REPLICA['ALIASES']``; everything else stays on ``default``.
+
+    Requests that follow one of the client's own writes are pinned to the
+    primary (see ``ReadReplicaMiddleware``) so users always read their writes.
+    """
+
+    primary = 'default'
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.READ_REPLICA['ALIASES']
+        if replicas and should_use_replica():
+            return random.choice(replicas)
+        return self.primary
+
+    def db_for_write(self, model, **hints):
+        return self.primary
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == self.primary
+
+
+class ReadReplicaMixin:
+    """
+    Marks safe (GET/HEAD/OPTIONS) requests of a view as read-only so their
+    queries are routed to a replica. Unsafe methods of the same view keep
+    reading from the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS:
+            mark_read_only()
+        super().initial(request, *args, **kwargs)
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from utils.history import history_buffer, purge_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes simple_history rows (comments, course requests, ...) older than "
+        "the retention period, in batches. With HISTORY['ASYNC'] on, queued "
+        "records are written first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.HISTORY['RETENTION_DAYS'],
+            help="Keep the rows of the last N days (default: HISTORY['RETENTION_DAYS']).",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if history_buffer.enabled:
+            while history_buffer.flush():
+                pass
+
+        deleted = purge_history(options['days'], options['batch_size'])
+        for label, count in deleted.items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Purged {sum(deleted.values())} history rows."))
@@ -0,0 +1,37 @@
+from django.conf import settings
+from rest_framework.permissions import SAFE_METHODS
+
+from core.db_router import mark_read_only, pin_to_primary, reset_routing_state
+
+
+class ReadReplicaMiddleware:
+    """
+    Keeps the replica routing state request-scoped and gives clients
+    read-your-writes stickiness: after a successful unsafe request
+    (e.g. posting a comment) a short-lived cookie pins the client's
+    following reads to the primary until the replicas have caught up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        cookie_name = settings.READ_REPLICA['STICKY_COOKIE']
+
+        read_only_token = mark_read_only(False)
+        pinned_token = pin_to_primary(cookie_name in request.COOKIES)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_routing_state(read_only_token, pinned_token)
+
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                cookie_name,
+                '1',
+                max_age=settings.READ_REPLICA['STICKY_SECONDS'],
+                httponly=True,
+                samesite='Lax',
+            )
+
+        return response
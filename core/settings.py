@@ -61,6 +61,7 @@ INSTALLED_APPS = [
     'simple_history',
 
     # First-party apps
+    'core',
     'accounts.apps.AccountsConfig',
     'courses.apps.CoursesConfig',
     'comments.apps.CommentsConfig',
@@ -75,6 +76,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReadReplicaMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -98,6 +100,18 @@ TEMPLATES = [
 WSGI_APPLICATION = 'core.wsgi.application'
 
 # DATABASES
+# Connection pooling (psycopg 3 pool) is sized per process: every gunicorn
+# worker and every Celery worker process gets its own pool.
+DB_POOL_ENABLED = os.getenv('DB_POOL_ENABLED', 'True') == 'True'
+
+DB_POOL_OPTIONS = {
+    "min_size": int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+    "max_size": int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+    "timeout": float(os.getenv('DB_POOL_TIMEOUT', 10)),  # Max seconds to wait for a free connection
+    "max_idle": float(os.getenv('DB_POOL_MAX_IDLE', 5 * 60)),
+    "max_lifetime": float(os.getenv('DB_POOL_MAX_LIFETIME', 60 * 60)),
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
@@ -106,7 +120,36 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),  # Your database password
         'HOST': os.getenv('DB_HOST'),  # Host where PostgreSQL is running
         'PORT': os.getenv('DB_PORT'),  # Leave empty for default port (5432)
+        # With a pool, connections are checked before being handed out;
+        # without one, persistent connections are checked on reuse.
+        'CONN_HEALTH_CHECKS': True,
+        'CONN_MAX_AGE': 0 if DB_POOL_ENABLED else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'OPTIONS': {'pool': DB_POOL_OPTIONS} if DB_POOL_ENABLED else {},
+    }
+}
+
+# READ REPLICAS
+# Comma separated replica hosts, e.g. "10.0.0.2,10.0.0.3:5433". Opt-in: without
+# it no replica alias (and no extra pool) exists and every read goes to "default".
+# To try the routing locally, point it at the primary host.
+_replica_hosts = [host.strip() for host in os.getenv('DB_REPLICA_HOSTS', '').split(',') if host.strip()]
+
+for _index, _host in enumerate(_replica_hosts, start=1):
+    _host, _, _port = _host.partition(':')
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST': _host,
+        'PORT': _port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
     }
+
+DATABASE_ROUTERS = ['core.db_router.ReadReplicaRouter']
+
+READ_REPLICA = {
+    "ALIASES": [alias for alias in DATABASES if alias != 'default'],  # Empty: the router keeps reads on "default"
+    # After a client's own write, its reads stay on the primary for this long.
+    "STICKY_COOKIE": "db_primary_pin",
+    "STICKY_SECONDS": 10,
 }
 
 # CACHES
@@ -120,6 +163,39 @@ CACHES = {
     }
 }
 
+# Two-tier cache: per-process LRU in front of the "default" cache,
+# invalidated across processes over Redis pub/sub (utils.tiered_cache)
+TIERED_CACHE = {
+    "MAX_ENTRIES": 2048,
+    "LOCAL_TIMEOUT": 60,  # Upper bound on local staleness if a broadcast is missed
+    "TIMEOUT": 60 * 60,
+    "CHANNEL": "tiered_cache:invalidate",
+}
+
+# Single-flight / stale-while-revalidate cache fills (utils.protected_cache)
+PROTECTED_CACHE = {
+    "STALE_TIMEOUT": 10 * 60,  # How long past expiry a value may still be served
+    "LOCK_TIMEOUT": 30,  # Upper bound of a recomputation
+    "WAIT_TIMEOUT": 5,  # How long a request waits on a cold key being filled elsewhere
+    "BETA": 1.0,  # > 1 favours earlier refreshes
+}
+
+# Write-behind buffer for hot counter columns (utils.counter_buffer)
+COUNTER_BUFFER = {
+    "ENABLED": os.getenv('COUNTER_BUFFER_ENABLED', 'True') == 'True',
+    "FLUSH_DELAY": 2,  # Seconds deltas are collected before one batched flush
+    "SCHEDULE_TIMEOUT": 60,  # Re-schedule if a flush task got lost
+}
+
+# simple_history records (utils.history)
+HISTORY = {
+    "ASYNC": os.getenv('HISTORY_ASYNC', 'False') == 'True',  # Queue records after commit, bulk insert from Celery
+    "FLUSH_DELAY": 5,  # Seconds records are collected before one batched insert
+    "SCHEDULE_TIMEOUT": 60,  # Re-schedule if a flush task got lost
+    "BATCH_SIZE": 1000,  # Records written per flush
+    "RETENTION_DAYS": int(os.getenv('HISTORY_RETENTION_DAYS', 365)),  # Older rows are removed by purge_history
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -193,6 +269,23 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_REFRESH_PATH": "/accounts/",
 }
 
+# Refresh token blacklist: "redis" (JTI with TTL, see accounts.tokens) or
+# "database" (simplejwt's token_blacklist tables)
+TOKEN_BLACKLIST = {
+    "BACKEND": os.getenv('TOKEN_BLACKLIST_BACKEND', 'redis'),
+}
+
+# Cached user resolution for JWTCookieAuthentication (accounts.user_cache)
+AUTH_USER_CACHE = {
+    "ENABLED": os.getenv('AUTH_USER_CACHE_ENABLED', 'True') == 'True',
+    "TIMEOUT": 15 * 60,  # One access token lifetime
+}
+
+# Signed email links (utils.email_token_manager)
+EMAIL_TOKEN = {
+    "MAX_AGE": 24 * 60 * 60,
+}
+
 # IMAGES
 IMAGE_SIZES = {
     "DEFAULT_ALL_IMAGE_SIZE_LIMIT": 1024,  # KB
@@ -206,6 +299,20 @@ CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
+# OTP messages must not wait behind bulk jobs: run a worker with `-Q sms`
+CELERY_TASK_ROUTES = {
+    'accounts.tasks.dispatch_sms_batch': {'queue': 'sms'},
+}
+
+# SMS dispatch (accounts.sms)
+SMS = {
+    "PROVIDER": os.getenv('SMS_PROVIDER', 'accounts.sms.ConsoleSMSProvider'),
+    "BATCH_SIZE": 100,  # Messages per provider call
+    "BATCH_DELAY": 0.05,  # Seconds a batch stays open to collect messages
+    "SCHEDULE_TIMEOUT": 60,  # Re-schedule if a dispatch task got lost
+    "MAX_RETRIES": 5,
+    "RETRY_BACKOFF": 2,  # Seconds, doubled on each retry
+}
 
 # SPECTACULAR
 SPECTACULAR_SETTINGS = {
@@ -222,9 +329,9 @@ OTP = {
     "LONG_TIME_SECONDS": 2 * 60 * 60,
     "LONG_MAX_REQUESTS": 2,
 
-    "VALID_WINDOW": 1,
-    # VALID_WINDOW defines how many time steps are valid for OTP
-    # verification Each step is 30 seconds, and values from 0 to 5 are allowed.
+    "DIGITS": 6,
+    "MAX_ATTEMPTS": 5,
+    # MAX_ATTEMPTS wrong guesses invalidate the code; a new one has to be requested.
 }
 
 
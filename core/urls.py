@@ -4,6 +4,8 @@ from django.conf.urls.static import static
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from core.views import DatabasePoolStatsView, TieredCacheStatsView, SMSMetricsView, CounterDriftMetricsView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -16,6 +18,12 @@ urlpatterns = [
     
     path('visit/', include('VisitCounter.urls')),
 
+    # metrics
+    path('api/metrics/db-pool/', DatabasePoolStatsView.as_view(), name='db-pool-stats'),
+    path('api/metrics/cache/', TieredCacheStatsView.as_view(), name='tiered-cache-stats'),
+    path('api/metrics/sms/', SMSMetricsView.as_view(), name='sms-metrics'),
+    path('api/metrics/counters/', CounterDriftMetricsView.as_view(), name='counter-drift-metrics'),
+
     # document schema patterns
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     # document schema optional ui
@@ -0,0 +1,41 @@
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.sms import get_sms_metrics
+from core.db_pool import get_pool_stats
+from courses.tasks import get_counter_drift_metrics
+from utils import tiered_cache
+
+
+class DatabasePoolStatsView(APIView):
+    """Connection pool metrics (wait time, saturation) of the serving worker."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats(), status=status.HTTP_200_OK)
+
+
+class TieredCacheStatsView(APIView):
+    """Hit/miss metrics of the two-tier cache in the serving worker."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(tiered_cache.stats(), status=status.HTTP_200_OK)
+
+
+class SMSMetricsView(APIView):
+    """Delivery metrics (batches, sent, failed, queue length) of the SMS dispatcher."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_sms_metrics(), status=status.HTTP_200_OK)
+
+
+class CounterDriftMetricsView(APIView):
+    """Course counter drift found (and fixed) by the last reconciliation run."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_counter_drift_metrics(), status=status.HTTP_200_OK)
@@ -0,0 +1,9 @@
+# Kept out of courses.views so signals and tasks can invalidate without importing the views.
+
+CATEGORY_HIERARCHY_CACHE_KEY = 'courses:category_hierarchy'
+LEARNING_LEVELS_CACHE_KEY = 'courses:learning_levels'
+
+# Generations of the protected course list/detail responses, bumped from courses.signals
+CATALOG_GENERATION_KEY = 'courses:generation:catalog'
+COURSE_LIST_GENERATION_KEY = 'courses:generation:list'
+COURSE_DETAIL_GENERATION_KEY = 'courses:generation:detail:{slug}'
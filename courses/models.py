@@ -6,12 +6,11 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
-from simple_history.models import HistoricalRecords
 from imagekit.models import ImageSpecField
 from taggit.managers import TaggableManager
 from mptt.models import MPTTModel, TreeForeignKey
 
-from utils import get_upload_to, validate_image_size, AutoSlugField
+from utils import get_upload_to, validate_image_size, AutoSlugField, BufferedHistoricalRecords
 
 
 # region Upload Patch
@@ -483,7 +482,7 @@ class CourseRequest(models.Model):
         default=RequestStatusChoices.DRAFT,
     )
     data = models.JSONField()
-    history = HistoricalRecords()
+    history = BufferedHistoricalRecords()
     comments = models.TextField(null=True, blank=True)
     admin_response = models.TextField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
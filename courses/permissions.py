@@ -1,12 +1,13 @@
 from rest_framework.exceptions import PermissionDenied
 
+from accounts.capabilities import Capability, get_capabilities
 from accounts.permissions import IsEmployee
 
 class IsTeacher(IsEmployee):
     def has_permission(self, request, view):
         super().has_permission(request, view)
         
-        if not request.user.has_perm('courses.can_teacher'):
+        if Capability.TEACHER not in get_capabilities(request.user):
             raise PermissionDenied('کاربر مجوزهای لازم را ندارد.')
 
         return True
\ No newline at end of file
@@ -3,7 +3,7 @@ from django.core.exceptions import ValidationError
 from rest_framework import serializers
 from taggit.serializers import TagListSerializerField, TaggitSerializer
 
-from utils import BaseNameRelatedField
+from utils import BaseNameRelatedField, SparseFieldsetSerializerMixin
 from courses.models import (
     Course,
     Lesson,
@@ -23,7 +23,7 @@ class CourseRelatedField(BaseNameRelatedField):
 
 
 # region Teacher
-class TeacherCourseListSerializer(serializers.ModelSerializer):
+class TeacherCourseListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     banner_thumbnail = serializers.ImageField(read_only=True)
     class Meta:
         model = Course
@@ -33,7 +33,7 @@ class TeacherCourseListSerializer(serializers.ModelSerializer):
         )
 
 
-class TeacherCourseDetailSerializer(TaggitSerializer, serializers.ModelSerializer):
+class TeacherCourseDetailSerializer(SparseFieldsetSerializerMixin, TaggitSerializer, serializers.ModelSerializer):
     tags = TagListSerializerField()
     categories = serializers.SerializerMethodField()
     learning_path = serializers.CharField(source='learning_path.title', read_only=True)
@@ -55,13 +55,13 @@ class TeacherCourseDetailSerializer(TaggitSerializer, serializers.ModelSerialize
         return list(obj.categories.values("title", "slug"))
 
 
-class TeacherSeasonSerializer(serializers.ModelSerializer):
+class TeacherSeasonSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Season
         fields = ('id', 'title', 'order', 'duration')
 
 
-class TeacherLessonSerializer(serializers.ModelSerializer):
+class TeacherLessonSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     season = serializers.SerializerMethodField()
     class Meta:
         model = Lesson
@@ -80,13 +80,13 @@ class TeacherLessonSerializer(serializers.ModelSerializer):
         return None
 
 
-class TeacherFeatureSerializer(serializers.ModelSerializer):
+class TeacherFeatureSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Feature
         fields = ('id', 'title', 'order', 'description',)
 
 
-class TeacherFAQSerializer(serializers.ModelSerializer):
+class TeacherFAQSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = FAQ
         fields = ('id', 'question', 'order', 'answer',)
@@ -185,7 +185,7 @@ class LearningLevelSerializer(serializers.ModelSerializer):
         fields = ('name', 'level_number')
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     This serializer is used to display an overview of all courses for users.
     It includes information about each course and the related teacher's details.
@@ -219,7 +219,7 @@ class CourseListSerializer(serializers.ModelSerializer):
         return representation
 
 
-class CourseDetailSerializer(TaggitSerializer, serializers.ModelSerializer):
+class CourseDetailSerializer(SparseFieldsetSerializerMixin, TaggitSerializer, serializers.ModelSerializer):
     tags = TagListSerializerField()
     teacher = serializers.SerializerMethodField(read_only=True)
     main_price = serializers.IntegerField(source='price.main_price', read_only=True)
@@ -308,7 +308,7 @@ class CourseDetailSerializer(TaggitSerializer, serializers.ModelSerializer):
     def to_representation(self, instance):
         representation = super().to_representation(instance)
 
-        if not representation.get('has_seasons', False):
+        if not instance.has_seasons:
             representation.pop('seasons', None)
         else:
             representation.pop('lessons', None)
@@ -1,11 +1,18 @@
 from django.db.models.signals import post_save, pre_save, post_delete
-from django.db.models import F
 from django.contrib.postgres.search import SearchVector
 from django.dispatch import receiver
+from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
-from courses.models import CourseCategory, Course, Price, Lesson, Season
+from courses.models import CourseCategory, Course, Price, Lesson, Season, LearningLevel, FAQ, Feature
+from courses.cache_keys import (
+    CATEGORY_HIERARCHY_CACHE_KEY,
+    LEARNING_LEVELS_CACHE_KEY,
+    CATALOG_GENERATION_KEY,
+    COURSE_LIST_GENERATION_KEY,
+    COURSE_DETAIL_GENERATION_KEY,
+)
 
-from utils import get_discounted_price, update_descendants_active_status
+from utils import get_discounted_price, update_descendants_active_status, tiered_cache, protected_cache, invalidate_object_id, counter_buffer
 
 
 @receiver(post_save, sender=CourseCategory)
@@ -13,6 +20,62 @@ def update_course_category_status(sender, instance, **kwargs):
     update_descendants_active_status(instance)
 
 
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+def invalidate_category_hierarchy_cache(sender, instance, **kwargs):
+    tiered_cache.invalidate(CATEGORY_HIERARCHY_CACHE_KEY)
+
+
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+def bump_catalog_generation(sender, instance, **kwargs):
+    protected_cache.bump_generation(CATALOG_GENERATION_KEY)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def bump_course_generation(sender, instance, **kwargs):
+    slugs = {instance.slug, getattr(instance, '_original_slug', instance.slug)}
+    protected_cache.bump_generation(
+        COURSE_LIST_GENERATION_KEY,
+        *(COURSE_DETAIL_GENERATION_KEY.format(slug=slug) for slug in slugs),
+    )
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course_object_id(sender, instance, **kwargs):
+    # Slug -> id lookups of comments and visits.
+    invalidate_object_id(
+        ContentType.objects.get_for_model(Course).pk,
+        *{instance.slug, getattr(instance, '_original_slug', instance.slug)},
+    )
+
+
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+@receiver(post_save, sender=Feature)
+@receiver(post_delete, sender=Feature)
+def bump_course_generation_on_related_change(sender, instance, **kwargs):
+    # Prices are part of the list too, the rest only of the detail page.
+    keys = [COURSE_DETAIL_GENERATION_KEY.format(slug=instance.course.slug)]
+    if sender is Price:
+        keys.append(COURSE_LIST_GENERATION_KEY)
+    protected_cache.bump_generation(*keys)
+
+
+@receiver(post_save, sender=LearningLevel)
+@receiver(post_delete, sender=LearningLevel)
+def invalidate_learning_levels_cache(sender, instance, **kwargs):
+    tiered_cache.invalidate(LEARNING_LEVELS_CACHE_KEY)
+
+
 @receiver(post_save, sender=Course)
 def update_search_vector(sender, instance, **kwargs):
     Course.objects.filter(
@@ -26,6 +89,7 @@ def update_search_vector(sender, instance, **kwargs):
 def update_title_and_slug_on_delete(sender, instance, **kwargs):
     if instance.pk:
         original_course = Course.objects.get(pk=instance.pk)
+        instance._original_slug = original_course.slug
         if original_course.is_deleted != instance.is_deleted and instance.is_deleted:
             instance.title = f"{instance.title} del"
             instance.slug = f"{instance.slug}-del"
@@ -63,16 +127,12 @@ def set_final_price(sender, instance, **kwargs):
 @receiver(post_save, sender=Lesson)
 def increase_count_lesson(sender, instance, created, **kwargs):
     if created:
-        Course.objects.filter(pk=instance.course.pk).update(
-            count_lessons=F('count_lessons') + 1 
-        )
+        counter_buffer.add(Course, instance.course_id, 'count_lessons', 1)
 
 
 @receiver(post_delete, sender=Lesson)
 def decrease_count_lesson(sender, instance, **kwargs):
-    Course.objects.filter(pk=instance.course.pk).update(
-            count_lessons=F('count_lessons') - 1 
-        )
+    counter_buffer.add(Course, instance.course_id, 'count_lessons', -1)
 
 
 @receiver(pre_save, sender=Course)
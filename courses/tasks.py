@@ -0,0 +1,108 @@
+import logging
+import time
+
+from celery import shared_task
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from comments.models import Comment
+from courses.models import Course, Lesson
+from courses.cache_keys import COURSE_LIST_GENERATION_KEY, COURSE_DETAIL_GENERATION_KEY
+from utils import counter_buffer, protected_cache
+
+
+logger = logging.getLogger(__name__)
+
+COUNTER_DRIFT_METRICS_KEY = 'courses:counter_drift'
+
+
+def count_by(queryset, field):
+    return dict(queryset.order_by().values(field).annotate(count=Count('pk')).values_list(field, 'count'))
+
+
+@shared_task
+def reconcile_course_counters(batch_size=500):
+    """
+    Recomputes ``Course.count_lessons`` (lessons not deleted) and
+    ``Course.count_comments`` (approved comments not deleted), which drift
+    when bulk updates bypass the signals maintaining them.
+
+    Courses are walked by id in batches. Each batch is locked, recounted
+    with one grouped aggregate per model and only the rows whose counters
+    differ are written. Deltas still waiting in the counter buffer are
+    flushed first and left out of the comparison.
+    """
+    started = time.monotonic()
+    counter_buffer.flush()
+    course_content_type = ContentType.objects.get_for_model(Course)
+    metrics = {'checked': 0, 'updated': 0, 'count_lessons_drift': 0, 'count_comments_drift': 0}
+    last_id = 0
+
+    while True:
+        with transaction.atomic():
+            courses = list(
+                Course.objects.select_for_update().filter(pk__gt=last_id).order_by('pk').only(
+                    'pk', 'slug', 'count_lessons', 'count_comments'
+                )[:batch_size]
+            )
+            if not courses:
+                break
+
+            ids = [course.pk for course in courses]
+            lessons = count_by(Lesson.objects.filter(course__in=ids, is_deleted=False), 'course')
+            comments = count_by(
+                Comment.objects.filter(
+                    content_type=course_content_type,
+                    object_id__in=ids,
+                    is_approved=True,
+                    is_deleted=False,
+                ),
+                'object_id',
+            )
+
+            # Buffered meanwhile; the next flush adds them on top of the stored value.
+            pending_lessons = counter_buffer.pending(Course, ids, 'count_lessons')
+            pending_comments = counter_buffer.pending(Course, ids, 'count_comments')
+
+            changed = []
+            for course in courses:
+                count_lessons = max(lessons.get(course.pk, 0) - pending_lessons.get(course.pk, 0), 0)
+                count_comments = max(comments.get(course.pk, 0) - pending_comments.get(course.pk, 0), 0)
+                if course.count_lessons == count_lessons and course.count_comments == count_comments:
+                    continue
+
+                metrics['count_lessons_drift'] += abs(course.count_lessons - count_lessons)
+                metrics['count_comments_drift'] += abs(course.count_comments - count_comments)
+                course.count_lessons = count_lessons
+                course.count_comments = count_comments
+                changed.append(course)
+
+            if changed:
+                Course.objects.bulk_update(changed, ['count_lessons', 'count_comments'])
+                protected_cache.bump_generation(
+                    COURSE_LIST_GENERATION_KEY,
+                    *(COURSE_DETAIL_GENERATION_KEY.format(slug=course.slug) for course in changed),
+                )
+
+        last_id = ids[-1]
+        metrics['checked'] += len(courses)
+        metrics['updated'] += len(changed)
+
+    metrics['elapsed_seconds'] = round(time.monotonic() - started, 2)
+    metrics['finished_at'] = timezone.now().isoformat()
+    cache.set(COUNTER_DRIFT_METRICS_KEY, metrics, timeout=None)
+
+    logger.info(
+        "reconcile_course_counters: %s of %s courses drifted (lessons %s, comments %s)",
+        metrics['updated'], metrics['checked'],
+        metrics['count_lessons_drift'], metrics['count_comments_drift'],
+    )
+    return metrics
+
+
+def get_counter_drift_metrics():
+    """Drift found by the last ``reconcile_course_counters`` run."""
+    return cache.get(COUNTER_DRIFT_METRICS_KEY) or {}
@@ -1,9 +1,13 @@
+import copy
+import hashlib
+
 from rest_framework import viewsets, generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.pagination import CursorPagination
 from rest_framework.exceptions import NotFound
 from django.db.models import Q, Prefetch, Count, F, Exists, OuterRef
+from django.http import QueryDict
 from django_filters.rest_framework import DjangoFilterBackend
 from django.contrib import messages
 from django.views.decorators.cache import cache_page
@@ -13,6 +17,8 @@ from django.shortcuts import get_list_or_404, get_object_or_404, redirect
 from django.contrib.contenttypes.models import ContentType
 
 from comments.models import Comment
+from core.db_router import ReadReplicaMixin, primary_db
+from utils import SparseFieldsetViewMixin, TieredCacheListMixin, protected_cache
 from courses import serializers
 from courses.filters import CourseFilter
 from courses.permissions import IsTeacher
@@ -27,6 +33,58 @@ from courses.models import (
     Season, 
     LearningLevel,
 )
+from courses.cache_keys import (
+    CATEGORY_HIERARCHY_CACHE_KEY,
+    LEARNING_LEVELS_CACHE_KEY,
+    CATALOG_GENERATION_KEY,
+    COURSE_LIST_GENERATION_KEY,
+    COURSE_DETAIL_GENERATION_KEY,
+)
+
+
+COURSE_LIST_CACHE_TIMEOUT = 60 * 5
+COURSE_DETAIL_CACHE_TIMEOUT = 60 * 15
+
+
+def get_filter_params(filterset_class):
+    """The query parameters a filterset reads (e.g. ``price_min``/``price_max`` for a range)."""
+    params = set()
+    for name, filter_ in filterset_class.base_filters.items():
+        suffixes = getattr(filter_.field.widget, 'suffixes', None)
+        if suffixes:
+            params.update(f'{name}_{suffix}' if suffix else name for suffix in suffixes)
+        else:
+            params.add(name)
+    return params
+
+
+def get_cacheable_request(request, params):
+    """
+    A copy of ``request`` whose query string only keeps ``params``, sorted,
+    so unknown parameters (``?utm_...``) neither get a cache entry of their
+    own nor end up in the cached pagination links.
+    """
+    query = QueryDict(mutable=True)
+    for param in sorted(params):
+        if param in request.query_params:
+            query.setlist(param, request.query_params.getlist(param))
+    
+    http_request = copy.copy(request._request)
+    http_request.GET = query
+    http_request.META = {**http_request.META, 'QUERY_STRING': query.urlencode()}
+    cacheable_request = copy.copy(request)
+    cacheable_request._request = http_request
+    return cacheable_request
+
+
+def get_request_cache_key(prefix, request):
+    """
+    One cache entry per host and query string (filters, cursor, sparse
+    fields) of a ``get_cacheable_request``: the payloads hold absolute
+    image and cursor URLs.
+    """
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"{prefix}:{digest}"
 
 
 class CourseListPagination(CursorPagination):
@@ -43,7 +101,7 @@ class CourseListPagination(CursorPagination):
 # region General View
 
 # @method_decorator(cache_page(60 * 15), name='dispatch')
-class UsersCourseListViewSet(viewsets.ModelViewSet):
+class UsersCourseListViewSet(ReadReplicaMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = Course.objects.annotate(
         has_active_category=Exists(
             CourseCategory.objects.filter(
@@ -57,18 +115,54 @@ class UsersCourseListViewSet(viewsets.ModelViewSet):
         is_deleted=False,
     ).exclude(
         status='CANCELLED'
-    ).annotate(
-        teacher_username=F('teacher__user_profile__employee_profile__username'),
-        teacher_first_name=F('teacher__first_name'),
-        teacher_last_name=F('teacher__last_name'),
-    ).select_related('price')
+    )
     serializer_class = serializers.CourseListSerializer
     pagination_class = CourseListPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = CourseFilter
     
+    sparse_select_related = {
+        'main_price': ['price'],
+        'final_price': ['price'],
+    }
+    sparse_annotations = {
+        'teacher': {
+            'teacher_username': F('teacher__user_profile__employee_profile__username'),
+            'teacher_first_name': F('teacher__first_name'),
+            'teacher_last_name': F('teacher__last_name'),
+        },
+    }
+    
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+    
+    def get_cache_params(self):
+        return {
+            *get_filter_params(self.filterset_class),
+            self.paginator.cursor_query_param,
+            self.paginator.page_size_query_param,
+            self.fields_query_param,
+            self.omit_query_param,
+        }
+    
+    def list(self, request, *args, **kwargs):
+        request = self.request = get_cacheable_request(request, self.get_cache_params())
+        
+        def compute():
+            # Fill from the primary so a lagging replica never gets cached.
+            with primary_db():
+                return super(UsersCourseListViewSet, self).list(request, *args, **kwargs).data
+        
+        data = protected_cache.get_or_compute(
+            get_request_cache_key('courses:list', request),
+            compute,
+            timeout=COURSE_LIST_CACHE_TIMEOUT,
+            generation_keys=[COURSE_LIST_GENERATION_KEY, CATALOG_GENERATION_KEY],
+        )
+        return Response(data, status=status.HTTP_200_OK)
+    
 
-class UserCourseDetailView(generics.RetrieveAPIView):
+class UserCourseDetailView(ReadReplicaMixin, SparseFieldsetViewMixin, generics.RetrieveAPIView):
     serializer_class = serializers.CourseDetailSerializer
     lookup_field = 'slug'
     queryset = Course.objects.annotate(
@@ -84,58 +178,94 @@ class UserCourseDetailView(generics.RetrieveAPIView):
         is_deleted=False,
     ).exclude(
         status='CANCELLED'
-    ).select_related(
-        'price',
-        'learning_path',
-        'learning_path__start_level',
-        'learning_path__end_level'
-    ).prefetch_related(
-        'tags',
-        Prefetch(
-            'features',
-            queryset=Feature.objects.filter(is_deleted=False).order_by('order', 'created_at', 'id'),
-            to_attr='prefetched_features'
-        ),
-        Prefetch(
-            'faqs',
-            queryset=FAQ.objects.filter(is_deleted=False).order_by('order', 'created_at', 'id'),
-            to_attr='prefetched_faqs'
-        ),
-        Prefetch(
-            'lessons',
-            queryset=Lesson.objects.exclude(
-                course__status='UPCOMING'
-            ).filter(
-                is_deleted=False,
-                is_published=True,
-            ).select_related('season').order_by('order', 'created_at', 'id'),
-            to_attr='prefetched_lessons'
-        ),
-        Prefetch(
-            'seasons',
-            queryset=Season.objects.exclude(
-                course__status='UPCOMING'
-            ).filter(
-                is_deleted=False,
-                course__has_seasons=True
-            ).annotate(
-                valid_lessons_count=Count(
-                    'lessons',
-                    filter=Q(lessons__is_deleted=False, lessons__is_published=True)
-                )
-            ).filter(valid_lessons_count__gt=0).order_by('order', 'created_at', 'id'),
-            to_attr='prefetched_seasons'
-        )
-    ).annotate(
-        teacher_username=F('teacher__user_profile__employee_profile__username'),
-        teacher_first_name=F('teacher__first_name'),
-        teacher_last_name=F('teacher__last_name'),
     )
+    
+    lessons_prefetch = Prefetch(
+        'lessons',
+        queryset=Lesson.objects.exclude(
+            course__status='UPCOMING'
+        ).filter(
+            is_deleted=False,
+            is_published=True,
+        ).select_related('season').order_by('order', 'created_at', 'id'),
+        to_attr='prefetched_lessons'
+    )
+    seasons_prefetch = Prefetch(
+        'seasons',
+        queryset=Season.objects.exclude(
+            course__status='UPCOMING'
+        ).filter(
+            is_deleted=False,
+            course__has_seasons=True
+        ).annotate(
+            valid_lessons_count=Count(
+                'lessons',
+                filter=Q(lessons__is_deleted=False, lessons__is_published=True)
+            )
+        ).filter(valid_lessons_count__gt=0).order_by('order', 'created_at', 'id'),
+        to_attr='prefetched_seasons'
+    )
+    
+    sparse_select_related = {
+        'main_price': ['price'],
+        'final_price': ['price'],
+        'learning_path': [
+            'learning_path',
+            'learning_path__start_level',
+            'learning_path__end_level',
+        ],
+    }
+    sparse_prefetches = {
+        'tags': ['tags'],
+        'feature': [
+            Prefetch(
+                'features',
+                queryset=Feature.objects.filter(is_deleted=False).order_by('order', 'created_at', 'id'),
+                to_attr='prefetched_features'
+            ),
+        ],
+        'faq': [
+            Prefetch(
+                'faqs',
+                queryset=FAQ.objects.filter(is_deleted=False).order_by('order', 'created_at', 'id'),
+                to_attr='prefetched_faqs'
+            ),
+        ],
+        'lessons': [lessons_prefetch],
+        'seasons': [lessons_prefetch, seasons_prefetch],
+    }
+    sparse_annotations = {
+        'teacher': {
+            'teacher_username': F('teacher__user_profile__employee_profile__username'),
+            'teacher_first_name': F('teacher__first_name'),
+            'teacher_last_name': F('teacher__last_name'),
+        },
+    }
+    
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(super().get_queryset())
+    
+    def retrieve(self, request, *args, **kwargs):
+        request = self.request = get_cacheable_request(request, {self.fields_query_param, self.omit_query_param})
+        slug = kwargs[self.lookup_field]
+        
+        def compute():
+            with primary_db():
+                return super(UserCourseDetailView, self).retrieve(request, *args, **kwargs).data
+        
+        data = protected_cache.get_or_compute(
+            get_request_cache_key(f'courses:detail:{slug}', request),
+            compute,
+            timeout=COURSE_DETAIL_CACHE_TIMEOUT,
+            generation_keys=[COURSE_DETAIL_GENERATION_KEY.format(slug=slug), CATALOG_GENERATION_KEY],
+        )
+        return Response(data, status=status.HTTP_200_OK)
 
 
 # @method_decorator(cache_page(60 * 60), name='dispatch')
-class CategoryHierarchyListView(generics.ListAPIView):
+class CategoryHierarchyListView(ReadReplicaMixin, TieredCacheListMixin, generics.ListAPIView):
     serializer_class = serializers.CategoryHierarchySerializer
+    list_cache_key = CATEGORY_HIERARCHY_CACHE_KEY
     queryset = CourseCategory.objects.filter(
         parent=None, is_active=True
     ).prefetch_related(
@@ -147,32 +277,48 @@ class CategoryHierarchyListView(generics.ListAPIView):
     ).order_by('lft')
 
 
-class LearningLevelView(generics.ListAPIView):
+class LearningLevelView(ReadReplicaMixin, TieredCacheListMixin, generics.ListAPIView):
     serializer_class = serializers.LearningLevelSerializer
+    list_cache_key = LEARNING_LEVELS_CACHE_KEY
     queryset = LearningLevel.objects.filter(is_active=True)
 
 # endregion
 
 
 # region Teacher Views
-class TeacherCourseListViewSet(viewsets.ModelViewSet):
+class TeacherCourseListViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherCourseListSerializer
     pagination_class = CourseListPagination
     
     def get_queryset(self):
-        return Course.objects.filter(is_deleted=False, teacher=self.request.user)
+        return self.apply_sparse_fieldset(
+            Course.objects.filter(is_deleted=False, teacher=self.request.user)
+        )
 
 
-class TeacherCourseDetailView(generics.RetrieveAPIView):
+class TeacherCourseDetailView(SparseFieldsetViewMixin, generics.RetrieveAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherCourseDetailSerializer
     
+    sparse_select_related = {
+        'learning_path': [
+            'learning_path',
+            'learning_path__start_level',
+            'learning_path__end_level',
+        ],
+    }
+    sparse_prefetches = {
+        'tags': ['tags'],
+    }
+    
     def get_queryset(self):
-        return Course.objects.filter(is_deleted=False, teacher=self.request.user)
+        return self.apply_sparse_fieldset(
+            Course.objects.filter(is_deleted=False, teacher=self.request.user)
+        )
 
 
-class TeacherSeasonView(generics.ListAPIView):
+class TeacherSeasonView(SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherSeasonSerializer
     
@@ -189,24 +335,28 @@ class TeacherSeasonView(generics.ListAPIView):
         )
 
 
-class TeacherLessonView(generics.ListAPIView):
+class TeacherLessonView(SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherLessonSerializer
     
+    sparse_select_related = {
+        'season': ['season'],
+    }
+    
     def get_queryset(self):
         course_slug = self.request.query_params.get("course", None)
         if not course_slug:
             raise NotFound(_("هیچ دوره ای یافت نشد."))
         
         return get_list_or_404(
-            Lesson,
+            self.apply_sparse_fieldset(Lesson.objects.all()),
             is_deleted=False,
             course__teacher=self.request.user,
             course__slug=course_slug
         )
 
 
-class TeacherFeatureView(generics.ListAPIView):
+class TeacherFeatureView(SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherFeatureSerializer
     
@@ -223,7 +373,7 @@ class TeacherFeatureView(generics.ListAPIView):
         )
 
 
-class TeacherFAQView(generics.ListAPIView):
+class TeacherFAQView(SparseFieldsetViewMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated, IsTeacher]
     serializer_class = serializers.TeacherFAQSerializer
     
@@ -19,3 +19,12 @@ from .update_descendants_active_status import *
 from .base_name_related_field import *
 
 from .get_client_ip import *
+
+from .sparse_fieldset import *
+
+from .tiered_cache import *
+from .get_content_type import *
+from .get_object_id import *
+from .protected_cache import *
+from .counter_buffer import *
+from .history import *
@@ -1,27 +1,24 @@
+import logging
 from django.core.cache import cache
-from django.core.exceptions import SuspiciousOperation
-import redis
+
+logger = logging.getLogger(__name__)
+
 
 class CacheManager:
     @staticmethod
     def set_new_value(user_id, value, key_name, timeout=None):
+        # A plain SET already replaces the previous value.
         try:
-            CacheManager.delete_value(user_id, key_name)
-            success = cache.set(f"{key_name}_{user_id}", str(value), timeout=timeout)
-            if not success:
-                raise SuspiciousOperation("Failed to set the cache value.")
+            cache.set(f"{key_name}_{user_id}", str(value), timeout=timeout)
         except Exception as e:
-            print(f"Error setting cache value: {e}")
+            logger.error("Error setting cache value: %s", e)
 
     @staticmethod
     def get_value(user_id, key_name):
         try:
-            value = cache.get(f"{key_name}_{user_id}")
-            if value is None:
-                print("Value not found in cache.")
-            return value
+            return cache.get(f"{key_name}_{user_id}")
         except Exception as e:
-            print(f"Error getting cache value: {e}")
+            logger.error("Error getting cache value: %s", e)
             return None
 
     @staticmethod
@@ -29,4 +26,4 @@ class CacheManager:
         try:
             cache.delete(f"{key_name}_{user_id}")
         except Exception as e:
-            print(f"Error deleting cache value: {e}")
+            logger.error("Error deleting cache value: %s", e)
@@ -0,0 +1,165 @@
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Greatest
+from redis.exceptions import ResponseError
+
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = 'counter_buffer:deltas'
+SCHEDULED_KEY = 'counter_buffer:flush_scheduled'
+PROCESSING_KEY = 'counter_buffer:processing'
+FLUSH_LOCK_KEY = 'counter_buffer:flush_lock'
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for hot counter columns (e.g. ``Course.count_comments``).
+
+    Deltas are accumulated per (model, pk, field) in one Redis hash once the
+    surrounding transaction commits, and ``flush`` applies them with one
+    UPDATE per model. A burst of comments on a popular course no longer
+    queues up on that course's row lock. Readers that need the exact value
+    call ``flush`` first (or add ``pending``).
+    """
+
+    def __init__(self):
+        config = settings.COUNTER_BUFFER
+        self.enabled = config['ENABLED']
+        self.flush_delay = config['FLUSH_DELAY']
+        self.schedule_timeout = config['SCHEDULE_TIMEOUT']
+
+    def _get_redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def make_field(model, pk, field):
+        return f"{model._meta.label_lower}:{pk}:{field}"
+
+    def add(self, model, pk, field, delta=1):
+        if not delta:
+            return
+        if not self.enabled:
+            self._update(model, pk, field, delta)
+            return
+        transaction.on_commit(lambda: self._push(model, pk, field, delta))
+
+    def _update(self, model, pk, field, delta):
+        model._default_manager.filter(pk=pk).update(**{field: F(field) + delta})
+
+    def _push(self, model, pk, field, delta):
+        try:
+            pipeline = self._get_redis().pipeline()
+            pipeline.hincrby(cache.make_key(BUFFER_KEY), self.make_field(model, pk, field), delta)
+            pipeline.set(cache.make_key(SCHEDULED_KEY), 1, nx=True, ex=self.schedule_timeout)
+            _, scheduled = pipeline.execute()
+        except Exception as e:
+            logger.warning("Counter buffer unavailable, updating %s directly: %s", model._meta.label, e)
+            self._update(model, pk, field, delta)
+            return
+
+        if scheduled:
+            from utils.tasks import flush_counter_buffer
+            flush_counter_buffer.apply_async(countdown=self.flush_delay)
+
+    def pending(self, model, pks, field):
+        """The deltas of these counters that have not been flushed yet, by pk."""
+        if not self.enabled or not pks:
+            return {}
+        fields = [self.make_field(model, pk, field) for pk in pks]
+        pipeline = self._get_redis().pipeline()
+        pipeline.hmget(cache.make_key(BUFFER_KEY), fields)
+        # Deltas taken by a flush that has not committed (or died) yet.
+        pipeline.hmget(cache.make_key(PROCESSING_KEY), fields)
+        buffered, processing = pipeline.execute()
+        pending = {}
+        for pk, *values in zip(pks, buffered, processing):
+            delta = sum(int(value) for value in values if value)
+            if delta:
+                pending[pk] = delta
+        return pending
+
+    def flush(self):
+        """
+        Applies every buffered delta. Returns the number of counters updated.
+
+        The hash is renamed to a processing key and only deleted once the
+        database update has committed, so a failed or killed flush leaves
+        its deltas there and the next flush applies them first.
+        """
+        if not self.enabled:
+            return 0
+
+        redis = self._get_redis()
+        buffer_key = cache.make_key(BUFFER_KEY)
+        processing_key = cache.make_key(PROCESSING_KEY)
+        lock_key = cache.make_key(FLUSH_LOCK_KEY)
+
+        if not redis.set(lock_key, 1, nx=True, ex=self.schedule_timeout):
+            # Another worker is flushing; its deltas are still counted by ``pending``.
+            return 0
+
+        try:
+            # Deltas buffered from now on schedule the next flush.
+            redis.delete(cache.make_key(SCHEDULED_KEY))
+
+            # Left behind by a flush that failed or was killed.
+            flushed = self._apply_processing(redis, processing_key)
+
+            try:
+                redis.rename(buffer_key, processing_key)
+            except ResponseError:
+                # Nothing buffered.
+                return flushed
+
+            return flushed + self._apply_processing(redis, processing_key)
+        finally:
+            redis.delete(lock_key)
+
+    def _apply_processing(self, redis, processing_key):
+        deltas = {}
+        for raw_field, raw_delta in redis.hgetall(processing_key).items():
+            delta = int(raw_delta)
+            if delta:
+                deltas[raw_field.decode() if isinstance(raw_field, bytes) else raw_field] = delta
+
+        if deltas:
+            self._apply(deltas)
+        redis.delete(processing_key)
+        return len(deltas)
+
+    def _apply(self, deltas):
+        groups = {}
+        for buffer_field, delta in deltas.items():
+            label, pk, field = buffer_field.split(':')
+            groups.setdefault(label, {}).setdefault(field, {})[pk] = delta
+
+        with transaction.atomic():
+            for label, fields in groups.items():
+                model = apps.get_model(label)
+                to_pk = model._meta.pk.to_python
+                pks = {to_pk(pk) for per_pk in fields.values() for pk in per_pk}
+
+                # Clamped: a counter that already drifted to 0 must not fail
+                # the UPDATE (and every other counter of the batch) on a
+                # positive-only column; reconciliation corrects the drift.
+                model._default_manager.filter(pk__in=pks).update(**{
+                    field: Greatest(
+                        F(field) + Case(
+                            *(When(pk=to_pk(pk), then=Value(delta)) for pk, delta in per_pk.items()),
+                            default=Value(0),
+                            output_field=IntegerField(),
+                        ),
+                        Value(0),
+                    )
+                    for field, per_pk in fields.items()
+                })
+
+
+counter_buffer = CounterBuffer()
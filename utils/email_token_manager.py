@@ -1,25 +1,60 @@
-from django.utils.crypto import get_random_string
+import hashlib
+
+from django.conf import settings
+from django.core import signing
+
 
 class EmailTokenManager:
+    """
+    Stateless, signed email tokens: the user id, purpose and address travel
+    inside the token (HMAC-signed with SECRET_KEY and timestamped), so
+    issuing and verifying a link needs no database lookup.
+
+    The token is also bound to the user's current email; once the address
+    changes, every link issued before is void, which makes them single-use.
+    """
+
+    salt = 'utils.email_token_manager'
 
     @staticmethod
-    def generate_unique_token(length=72):
-        from accounts.models import User
-        while True:
-            token = get_random_string(length)
-            if not User.objects.filter(email_verify_token=token).exists():
-                return token
-    
+    def _email_state(email):
+        return hashlib.sha256((email or '').lower().encode()).hexdigest()[:16]
+
     @staticmethod
-    def assign_email_token_to_user(user):
-        token = EmailTokenManager.generate_unique_token()
-        user.email_verify_token = token
-        user.save()
-    
+    def make_token(user, email, purpose='verify_email'):
+        return signing.dumps(
+            {
+                'uid': user.pk,
+                'purpose': purpose,
+                'email': email,
+                'state': EmailTokenManager._email_state(user.email),
+            },
+            salt=EmailTokenManager.salt,
+            compress=True,
+        )
+
+    @staticmethod
+    def read_token(token, purpose='verify_email', user=None, max_age=None):
+        """
+        Returns the token payload (uid, purpose, email) or None if it is
+        forged, expired, meant for another purpose or another user, or the
+        user's email has changed since it was issued.
+        """
+        max_age = settings.EMAIL_TOKEN['MAX_AGE'] if max_age is None else max_age
+        try:
+            payload = signing.loads(token, salt=EmailTokenManager.salt, max_age=max_age)
+        except signing.BadSignature:
+            return None
+
+        if payload.get('purpose') != purpose:
+            return None
+        if user is not None and (
+            payload.get('uid') != user.pk
+            or payload.get('state') != EmailTokenManager._email_state(user.email)
+        ):
+            return None
+        return payload
+
     @staticmethod
-    def is_email_token_valid(user ,token):
-        from accounts.models import User
-        is_valid = User.objects.filter(id=user.id, email_verify_token=token).exists()
-        if is_valid:
-            EmailTokenManager.assign_email_token_to_user(user)
-        return is_valid
+    def is_email_token_valid(user, token, purpose='verify_email'):
+        return EmailTokenManager.read_token(token, purpose=purpose, user=user) is not None
@@ -0,0 +1,17 @@
+from django.contrib.contenttypes.models import ContentType
+
+from utils.tiered_cache import tiered_cache
+
+
+def get_content_type(model_name):
+    """
+    Same as ``ContentType.objects.get(model=model_name)`` but answered from
+    the tiered cache (name -> id) and Django's own per-process ContentType
+    cache (id -> instance). Raises ``ContentType.DoesNotExist``.
+    """
+    model_name = model_name.lower()
+    content_type_id = tiered_cache.get_or_set(
+        f"content_type:{model_name}",
+        lambda: ContentType.objects.get(model=model_name).pk,
+    )
+    return ContentType.objects.get_for_id(content_type_id)
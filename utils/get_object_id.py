@@ -0,0 +1,33 @@
+from django.db import transaction
+
+from core.db_router import primary_db
+from utils.tiered_cache import tiered_cache
+
+
+def get_object_id_cache_key(content_type_id, slug):
+    return f"object_id:{content_type_id}:{slug}"
+
+
+def get_object_id(content_type, slug):
+    """
+    Id of the object of ``content_type`` with this slug, answered from the
+    tiered cache. Raises the model's ``DoesNotExist``; misses are not cached.
+    """
+    key = get_object_id_cache_key(content_type.pk, slug)
+    object_id = tiered_cache.get(key)
+    if object_id is not None:
+        return object_id
+
+    model_class = content_type.model_class()
+    # A replica may still map the slug to its previous object.
+    with primary_db():
+        object_id = model_class.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if object_id is None:
+        raise model_class.DoesNotExist
+    # Only a committed mapping is shared, like the invalidation in tiered_cache.
+    transaction.on_commit(lambda: tiered_cache.set(key, object_id))
+    return object_id
+
+
+def invalidate_object_id(content_type_id, *slugs):
+    tiered_cache.invalidate(*(get_object_id_cache_key(content_type_id, slug) for slug in slugs))
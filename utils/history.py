@@ -0,0 +1,287 @@
+import logging
+import pickle
+from datetime import timedelta
+from operator import attrgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, InterfaceError, OperationalError, transaction
+from django.utils import timezone
+from simple_history.exceptions import NotHistoricalModelError
+from simple_history.models import HistoricalRecords, registered_models
+from simple_history.signals import post_create_historical_record, pre_create_historical_record
+from simple_history.utils import get_history_model_for_model
+
+
+logger = logging.getLogger(__name__)
+
+HISTORY_BUFFER_KEY = 'history_buffer:snapshots'
+HISTORY_SCHEDULED_KEY = 'history_buffer:flush_scheduled'
+HISTORY_PROCESSING_KEY = 'history_buffer:processing'
+HISTORY_FLUSH_LOCK_KEY = 'history_buffer:flush_lock'
+HISTORY_DEAD_LETTER_KEY = 'history_buffer:dead_letter'
+
+
+class HistoryBuffer:
+    """
+    Write-behind buffer for ``simple_history`` records.
+
+    When ``HISTORY['ASYNC']`` is on, the historical row of a save is taken
+    as a snapshot (with its ``history_date`` and user) inside the request,
+    pushed to a Redis list once the transaction commits and written later
+    with one ``bulk_create`` per historical model. Snapshots of a rolled
+    back transaction are never queued. If Redis is unavailable the rows are
+    written right away, as in the synchronous mode.
+
+    ``pre_create_historical_record`` is sent when the snapshot is taken, so
+    receivers can still fill extra history fields; ``post_create_historical_record``
+    is sent once the row is inserted, with the instance rebuilt from it.
+    """
+
+    def __init__(self):
+        config = settings.HISTORY
+        self.enabled = config['ASYNC']
+        self.flush_delay = config['FLUSH_DELAY']
+        self.schedule_timeout = config['SCHEDULE_TIMEOUT']
+        self.batch_size = config['BATCH_SIZE']
+
+    def _get_redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    @staticmethod
+    def make_snapshot(history_model, instance, history_type, history_date, history_user, history_change_reason):
+        history_instance = history_model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **{field.attname: getattr(instance, field.attname) for field in history_model.tracked_fields},
+        )
+        pre_create_historical_record.send(
+            sender=history_model,
+            instance=instance,
+            history_date=history_date,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            history_instance=history_instance,
+            using=None,
+        )
+        snapshot = {
+            field.attname: getattr(history_instance, field.attname)
+            for field in history_model._meta.concrete_fields
+            if not field.primary_key
+        }
+        return history_model._meta.label_lower, snapshot
+
+    def add(self, snapshots):
+        if snapshots:
+            transaction.on_commit(lambda: self._push(snapshots))
+
+    def bulk_history_create(self, model, objs, update=False, default_user=None, default_date=None):
+        """``model.history.bulk_history_create`` that goes through the buffer when it is enabled."""
+        if not self.enabled:
+            model.history.bulk_history_create(
+                objs, update=update, default_user=default_user, default_date=default_date,
+            )
+            return
+
+        history_model = model.history.model
+        history_date = default_date or timezone.now()
+        self.add([
+            self.make_snapshot(
+                history_model,
+                instance,
+                '~' if update else '+',
+                getattr(instance, '_history_date', history_date),
+                getattr(instance, '_history_user', default_user),
+                getattr(instance, '_change_reason', ''),
+            )
+            for instance in objs
+        ])
+
+    def _push(self, snapshots):
+        try:
+            redis = self._get_redis()
+            redis.rpush(cache.make_key(HISTORY_BUFFER_KEY), *(pickle.dumps(snapshot) for snapshot in snapshots))
+        except Exception as e:
+            logger.warning("History buffer unavailable, writing %s records directly: %s", len(snapshots), e)
+            history_instances = [self._build(label, snapshot) for label, snapshot in snapshots]
+            self._write(history_instances)
+            self._send_post_create(history_instances)
+            return
+
+        self._schedule(redis)
+
+    def _schedule(self, redis):
+        if redis.set(cache.make_key(HISTORY_SCHEDULED_KEY), 1, nx=True, ex=self.schedule_timeout):
+            from utils.tasks import flush_history_buffer
+            flush_history_buffer.apply_async(countdown=self.flush_delay)
+
+    def flush(self):
+        """
+        Writes up to ``BATCH_SIZE`` queued records and schedules another
+        flush if more are waiting. Returns the number of records written.
+
+        Records are moved to a processing list and only removed from it
+        once their insert has committed, so a failed or killed flush loses
+        nothing; the next flush writes them first. Records that can never
+        be written (e.g. pickled before a schema change) are moved to a
+        dead-letter list instead of blocking the queue.
+        """
+        redis = self._get_redis()
+        buffer_key = cache.make_key(HISTORY_BUFFER_KEY)
+        processing_key = cache.make_key(HISTORY_PROCESSING_KEY)
+        lock_key = cache.make_key(HISTORY_FLUSH_LOCK_KEY)
+
+        if not redis.set(lock_key, 1, nx=True, ex=self.schedule_timeout):
+            return 0
+
+        try:
+            # Snapshots queued from now on schedule the next flush.
+            redis.delete(cache.make_key(HISTORY_SCHEDULED_KEY))
+
+            # A non-empty processing list was left behind by a failed or killed flush.
+            if not redis.llen(processing_key):
+                pipeline = redis.pipeline()
+                for _ in range(self.batch_size):
+                    pipeline.lmove(buffer_key, processing_key, 'LEFT', 'RIGHT')
+                pipeline.execute()
+
+            raw_snapshots = redis.lrange(processing_key, 0, -1)
+            if not raw_snapshots:
+                return 0
+
+            history_instances = self._write_raw(redis, raw_snapshots)
+            redis.delete(processing_key)
+
+            if redis.llen(buffer_key):
+                self._schedule(redis)
+        finally:
+            redis.delete(lock_key)
+
+        # Only once acknowledged: a failing receiver must not get the rows written twice.
+        self._send_post_create(history_instances)
+        return len(history_instances)
+
+    def _write_raw(self, redis, raw_snapshots):
+        history_instances = []
+        for raw in raw_snapshots:
+            try:
+                history_instances.append((raw, self._build(*pickle.loads(raw))))
+            except Exception as e:
+                self._dead_letter(redis, raw, e)
+
+        try:
+            self._write([history_instance for _raw, history_instance in history_instances])
+            return [history_instance for _raw, history_instance in history_instances]
+        except (OperationalError, InterfaceError):
+            # The database is unreachable; keep the batch for the next flush.
+            raise
+        except DatabaseError:
+            pass
+
+        # Some row is rejected by the database; find it instead of retrying the batch forever.
+        written = []
+        for raw, history_instance in history_instances:
+            try:
+                self._write([history_instance])
+                written.append(history_instance)
+            except (OperationalError, InterfaceError):
+                raise
+            except DatabaseError as e:
+                self._dead_letter(redis, raw, e)
+        return written
+
+    def _dead_letter(self, redis, raw, error):
+        logger.error("History record could not be written, moved to the dead-letter list: %s", error)
+        redis.rpush(cache.make_key(HISTORY_DEAD_LETTER_KEY), raw)
+
+    @staticmethod
+    def _build(label, snapshot):
+        history_model = apps.get_model(label)
+        return history_model(**snapshot)
+
+    def _write(self, history_instances):
+        groups = {}
+        for history_instance in history_instances:
+            groups.setdefault(type(history_instance), []).append(history_instance)
+
+        with transaction.atomic():
+            for history_model, model_instances in groups.items():
+                # Ids follow history_date, like rows written one by one.
+                model_instances.sort(key=attrgetter('history_date'))
+                history_model.objects.bulk_create(model_instances)
+
+    @staticmethod
+    def _send_post_create(history_instances):
+        for history_instance in history_instances:
+            history_model = type(history_instance)
+            if post_create_historical_record.has_listeners(history_model):
+                post_create_historical_record.send(
+                    sender=history_model,
+                    instance=history_instance.instance,
+                    history_instance=history_instance,
+                    history_date=history_instance.history_date,
+                    history_user=history_instance.history_user,
+                    history_change_reason=history_instance.history_change_reason,
+                    using=None,
+                )
+
+
+history_buffer = HistoryBuffer()
+
+
+class BufferedHistoricalRecords(HistoricalRecords):
+    """``HistoricalRecords`` whose rows are written through ``history_buffer`` when it is enabled."""
+
+    def create_historical_record(self, instance, history_type, using=None):
+        if not history_buffer.enabled:
+            return super().create_historical_record(instance, history_type, using=using)
+
+        manager = getattr(instance, self.manager_name)
+        history_buffer.add([
+            history_buffer.make_snapshot(
+                manager.model,
+                instance,
+                history_type,
+                getattr(instance, '_history_date', timezone.now()),
+                self.get_history_user(instance),
+                self.get_change_reason_for_object(instance, history_type, using),
+            )
+        ])
+
+
+def purge_history(days=None, batch_size=5000):
+    """
+    Deletes historical rows older than ``days`` (``HISTORY['RETENTION_DAYS']``
+    by default) from every history table, in batches so no single DELETE
+    holds its locks for long. Returns the number of rows deleted per model.
+    """
+    days = settings.HISTORY['RETENTION_DAYS'] if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted = {}
+
+    for model in registered_models.values():
+        try:
+            history_model = get_history_model_for_model(model)
+        except NotHistoricalModelError:
+            # An m2m through model; its rows go with the parent history.
+            continue
+
+        total = 0
+        while True:
+            ids = list(
+                history_model.objects.filter(history_date__lt=cutoff)
+                .order_by('history_date').values_list('pk', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += history_model.objects.filter(pk__in=ids).delete()[0]
+
+        deleted[history_model._meta.label] = total
+        if total:
+            logger.info("purge_history: deleted %s rows of %s older than %s days", total, history_model._meta.label, days)
+
+    return deleted
@@ -1,64 +1,95 @@
-import pyotp
+import secrets
+from django.core.cache import cache
 from django.core.exceptions import SuspiciousOperation
 from django.conf import settings
-from utils.cache_manager import CacheManager
+from django.utils.crypto import salted_hmac
 
 OTP_TIMEOUT = settings.OTP["EXPIRATION_TIME_SECONDS"]
+OTP_DIGITS = settings.OTP["DIGITS"]
+OTP_MAX_ATTEMPTS = settings.OTP["MAX_ATTEMPTS"]
+
 
 class OTPManager:
+    """
+    One-time codes stored in a Redis hash (code digest + failed attempts).
+
+    Issuing replaces any previous code and verifying consumes it, each in a
+    single atomic script, so two parallel verify requests can never both
+    succeed and a code is dropped after ``OTP["MAX_ATTEMPTS"]`` wrong guesses.
+    """
+
+    # KEYS[1]: otp hash, ARGV[1]: code digest, ARGV[2]: timeout (s)
+    issue_script = """
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+    """
+
+    # KEYS[1]: otp hash, ARGV[1]: code digest, ARGV[2]: max attempts
+    # Returns 1 if the code matched (and was consumed), 0 otherwise
+    verify_script = """
+    local code = redis.call('HGET', KEYS[1], 'code')
+    if not code then
+        return 0
+    end
+    if code == ARGV[1] then
+        redis.call('DEL', KEYS[1])
+        return 1
+    end
+    local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+    if attempts >= tonumber(ARGV[2]) then
+        redis.call('DEL', KEYS[1])
+    end
+    return 0
+    """
+
+    _scripts = {}
+
     @staticmethod
-    def get_totp(secret):
-        """Returns a TOTP object for the given secret."""
-        return pyotp.TOTP(secret)
+    def get_script(name):
+        if name not in OTPManager._scripts:
+            from django_redis import get_redis_connection
+            source = getattr(OTPManager, f"{name}_script")
+            OTPManager._scripts[name] = get_redis_connection('default').register_script(source)
+        return OTPManager._scripts[name]
 
     @staticmethod
-    def store_secret(user_id, secret, prefix='otp_secret'):
-        """Store the OTP secret in the cache using CacheManager."""
-        try:
-            CacheManager.set_new_value(user_id, secret, prefix, OTP_TIMEOUT)
-        except SuspiciousOperation as e:
-            raise SuspiciousOperation(f"Error storing OTP secret: {e}")
+    def get_key(user_id, prefix):
+        return cache.make_key(f"{prefix}_{user_id}")
 
     @staticmethod
-    def retrieve_secret(user_id, prefix='otp_secret'):
-        """Retrieve the OTP secret from the cache using CacheManager."""
-        secret = CacheManager.get_value(user_id, prefix)
-        if secret is None:
-            raise SuspiciousOperation("OTP secret not found in cache.")
-        return secret
+    def get_digest(key, otp):
+        """Only a keyed digest of the code is stored, never the code itself."""
+        code = str(otp).zfill(OTP_DIGITS)
+        return salted_hmac('utils.otp', f"{key}:{code}").hexdigest()
 
     @staticmethod
     def generate_otp(user_id, prefix='otp_secret'):
-        """Generate a one-time password (OTP) and store its secret."""
+        """Generate a one-time password (OTP), replacing any previous one."""
+        otp = str(secrets.randbelow(10 ** OTP_DIGITS)).zfill(OTP_DIGITS)
+        key = OTPManager.get_key(user_id, prefix)
 
-        secret = pyotp.random_base32()
-        OTPManager.store_secret(user_id, secret, prefix)
-        
-        totp = OTPManager.get_totp(secret)
-        return totp.now()
+        try:
+            OTPManager.get_script('issue')(keys=[key], args=[OTPManager.get_digest(key, otp), OTP_TIMEOUT])
+        except Exception as e:
+            raise SuspiciousOperation(f"Error storing OTP: {e}")
+        return otp
 
     @staticmethod
     def verify_otp(user_id, otp, prefix='otp_secret'):
-        """Verify the provided OTP against the stored secret."""
-        secret = OTPManager.retrieve_secret(user_id, prefix)
-        if secret is None:
-            return False
-
-        totp = OTPManager.get_totp(secret)
-        valid_window = settings.OTP["VALID_WINDOW"]
-        if totp.verify(otp, valid_window=valid_window):
-            OTPManager.delete_otp(user_id, prefix)
-            return True
-
-        return False
+        """Verify and consume the provided OTP; wrong guesses count against the code."""
+        key = OTPManager.get_key(user_id, prefix)
+        digest = OTPManager.get_digest(key, otp)
+        return bool(OTPManager.get_script('verify')(keys=[key], args=[digest, OTP_MAX_ATTEMPTS]))
 
     @staticmethod
     def delete_otp(user_id, prefix='otp_secret'):
-        """Delete the stored OTP secret from the cache using CacheManager."""
+        """Delete the stored OTP from the cache."""
         try:
-            CacheManager.delete_value(user_id, prefix)
+            cache.delete(f"{prefix}_{user_id}")
         except Exception as e:
-            raise SuspiciousOperation(f"Error deleting OTP secret: {e}")
+            raise SuspiciousOperation(f"Error deleting OTP: {e}")
 
 
 # ==============================================
@@ -66,7 +97,6 @@ class OTPManager:
 # ==============================================
 
 def generate_otp_auth_num(user_id):
-    delete_otp_auth_num(user_id)
     """Generate a one-time password (OTP) for authentication."""
     return OTPManager.generate_otp(user_id, prefix='otp_secret_auth_num')
 
@@ -84,7 +114,6 @@ def delete_otp_auth_num(user_id):
 # ==============================================
 
 def generate_otp_change_phone(user_id):
-    delete_otp_change_phone(user_id)
     return OTPManager.generate_otp(user_id, prefix='otp_secret_change_phone')
 
 def verify_otp_change_phone(user_id, otp):
@@ -104,4 +133,4 @@ def verify_otp_reset_password(user_id, otp):
     return OTPManager.verify_otp(user_id, otp, prefix='otp_secret_reset_password')
 
 def delete_otp_reset_password(user_id):
-    OTPManager.delete_otp(user_id, prefix='otp_secret_reset_password')
\ No newline at end of file
+    OTPManager.delete_otp(user_id, prefix='otp_secret_reset_password')
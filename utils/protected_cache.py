@@ -0,0 +1,114 @@
+import logging
+import math
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.db import transaction
+from django.http import Http404
+from rest_framework.exceptions import APIException
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProtectedCache:
+    """
+    Cache helper for expensive fills (e.g. a course detail prefetch chain).
+
+    - Single-flight: only the worker holding ``<key>:lock`` recomputes, all
+      others keep serving the previous value (or briefly wait on a cold key).
+    - Probabilistic early refresh (XFetch): as an entry gets close to its
+      expiry, a request is increasingly likely to refresh it in advance.
+    - Stale-while-revalidate: invalidation bumps a generation instead of
+      deleting, so old values keep being served while one worker recomputes,
+      and are also served if the recomputation fails.
+    """
+
+    # Errors that describe the data rather than a failure; never hide them.
+    authoritative_errors = (Http404, ObjectDoesNotExist, ValidationError, APIException)
+
+    def __init__(self):
+        config = settings.PROTECTED_CACHE
+        self.stale_timeout = config['STALE_TIMEOUT']
+        self.lock_timeout = config['LOCK_TIMEOUT']
+        self.wait_timeout = config['WAIT_TIMEOUT']
+        self.beta = config['BETA']
+
+    def bump_generation(self, *generation_keys):
+        """Marks every entry depending on these keys as stale, after commit."""
+        def bump():
+            now = time.time_ns()
+            cache.set_many({key: now for key in generation_keys}, timeout=None)
+
+        transaction.on_commit(bump)
+
+    def should_refresh(self, envelope, generation):
+        if envelope['generation'] != generation:
+            return True
+
+        # XFetch: now - delta * beta * ln(rand) >= expiry
+        jitter = envelope['delta'] * self.beta * math.log(1 - random.random())
+        return time.time() - jitter >= envelope['expires_at']
+
+    def get_or_compute(self, key, compute, timeout, generation_keys=None):
+        keys = [key, *(generation_keys or [])]
+        values = cache.get_many(keys)
+        envelope = values.get(key)
+        generation = tuple(values.get(k, 0) for k in generation_keys) if generation_keys else None
+
+        if envelope is not None and not self.should_refresh(envelope, generation):
+            return envelope['value']
+
+        lock_key = f"{key}:lock"
+        if cache.add(lock_key, 1, timeout=self.lock_timeout):
+            try:
+                return self._compute_and_store(key, compute, timeout, generation)
+            except self.authoritative_errors:
+                raise
+            except Exception as e:
+                if envelope is None:
+                    raise
+                logger.error("Error refreshing cache key %s, serving stale value: %s", key, e)
+                return envelope['value']
+            finally:
+                cache.delete(lock_key)
+
+        if envelope is not None:
+            # Another worker is already refreshing this key.
+            return envelope['value']
+
+        return self._wait_for_fill(key, compute, generation)
+
+    def _compute_and_store(self, key, compute, timeout, generation):
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+
+        cache.set(
+            key,
+            {
+                'value': value,
+                'generation': generation,
+                'delta': delta,
+                'expires_at': time.time() + timeout,
+            },
+            timeout=timeout + self.stale_timeout,
+        )
+        return value
+
+    def _wait_for_fill(self, key, compute, generation):
+        deadline = time.time() + self.wait_timeout
+        while time.time() < deadline:
+            time.sleep(0.05)
+            envelope = cache.get(key)
+            if envelope is not None and envelope['generation'] == generation:
+                return envelope['value']
+
+        # The filling worker is too slow (or died); don't hold the request any longer.
+        return compute()
+
+
+protected_cache = ProtectedCache()
@@ -0,0 +1,105 @@
+from django.db.models import Prefetch
+
+
+def parse_fields_param(value):
+    if not value:
+        return None
+    return {field.strip() for field in value.split(',') if field.strip()}
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Drops every serializer field that is not part of the fieldset the view
+    resolved for this request (``context['sparse_fields']``).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        sparse_fields = self.context.get('sparse_fields')
+        if sparse_fields is None:
+            return
+
+        for field_name in set(self.fields) - set(sparse_fields):
+            self.fields.pop(field_name)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Adds ``?fields=a,b`` / ``?omit=c,d`` support to a view.
+
+    Besides pruning the serializer, the queryset only gets the prefetches,
+    select_related lookups and annotations of the fields that are actually
+    rendered, so omitted sections cost zero queries:
+
+        sparse_prefetches = {'faq': [Prefetch('faqs', ...)]}
+        sparse_select_related = {'main_price': ['price']}
+        sparse_annotations = {'teacher': {'teacher_username': F(...)}}
+    """
+
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    sparse_prefetches = {}
+    sparse_select_related = {}
+    sparse_annotations = {}
+
+    def get_available_fields(self):
+        serializer_class = self.get_serializer_class()
+        return list(serializer_class.Meta.fields)
+
+    def get_sparse_fields(self):
+        if hasattr(self, '_sparse_fields'):
+            return self._sparse_fields
+
+        available = self.get_available_fields()
+        fields = parse_fields_param(self.request.query_params.get(self.fields_query_param))
+        omit = parse_fields_param(self.request.query_params.get(self.omit_query_param))
+
+        if fields is None and omit is None:
+            self._sparse_fields = None
+            return None
+
+        selected = [field for field in available if fields is None or field in fields]
+        if omit:
+            selected = [field for field in selected if field not in omit]
+
+        self._sparse_fields = selected
+        return selected
+
+    def is_field_requested(self, field_name):
+        sparse_fields = self.get_sparse_fields()
+        return sparse_fields is None or field_name in sparse_fields
+
+    def apply_sparse_fieldset(self, queryset):
+        prefetches = {}
+        for field_name, lookups in self.sparse_prefetches.items():
+            if self.is_field_requested(field_name):
+                for lookup in lookups:
+                    # Several fields may share one Prefetch (e.g. lessons and seasons)
+                    key = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+                    prefetches[key] = lookup
+
+        select_related = []
+        for field_name, lookups in self.sparse_select_related.items():
+            if self.is_field_requested(field_name):
+                select_related.extend(lookup for lookup in lookups if lookup not in select_related)
+
+        annotations = {}
+        for field_name, expressions in self.sparse_annotations.items():
+            if self.is_field_requested(field_name):
+                annotations.update(expressions)
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches.values())
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
@@ -0,0 +1,19 @@
+from celery import shared_task
+
+from utils.counter_buffer import counter_buffer
+from utils.history import history_buffer, purge_history
+
+
+@shared_task
+def flush_counter_buffer():
+    return counter_buffer.flush()
+
+
+@shared_task
+def flush_history_buffer():
+    return history_buffer.flush()
+
+
+@shared_task
+def purge_old_history():
+    return purge_history()
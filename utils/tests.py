@@ -0,0 +1,158 @@
+import time
+from unittest import mock
+
+import fakeredis
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from comments.models import Comment
+from utils.counter_buffer import BUFFER_KEY, PROCESSING_KEY, CounterBuffer
+from utils.protected_cache import ProtectedCache
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    COUNTER_BUFFER={'ENABLED': True, 'FLUSH_DELAY': 2, 'SCHEDULE_TIMEOUT': 60},
+)
+class CounterBufferTests(TestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeStrictRedis()
+        self.buffer = CounterBuffer()
+        self.buffer._get_redis = lambda: self.redis
+
+        schedule = mock.patch('utils.tasks.flush_counter_buffer.apply_async')
+        self.apply_async = schedule.start()
+        self.addCleanup(schedule.stop)
+
+        user = get_user_model().objects.create_user(phone='+989120000000')
+        # bulk_create: no commented object is needed for a counter row.
+        self.comment, = Comment.objects.bulk_create([Comment(
+            content_type=ContentType.objects.get_for_model(Comment),
+            object_id=1,
+            user=user,
+            text='comment',
+        )])
+
+    def add(self, delta):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.add(Comment, self.comment.pk, 'reply_count', delta)
+
+    def get_reply_count(self):
+        return Comment.objects.values_list('reply_count', flat=True).get(pk=self.comment.pk)
+
+    def test_add_buffers_after_commit_and_schedules_one_flush(self):
+        self.add(2)
+        self.add(3)
+
+        self.assertEqual(self.get_reply_count(), 0)
+        self.assertEqual(self.buffer.pending(Comment, [self.comment.pk], 'reply_count'), {self.comment.pk: 5})
+        self.apply_async.assert_called_once()
+
+    def test_add_without_redis_updates_directly(self):
+        self.buffer._get_redis = mock.Mock(side_effect=ConnectionError)
+        self.add(2)
+
+        self.assertEqual(self.get_reply_count(), 2)
+
+    def test_flush_applies_deltas_and_empties_the_buffer(self):
+        self.add(4)
+        self.add(-1)
+
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.get_reply_count(), 3)
+        self.assertEqual(self.buffer.pending(Comment, [self.comment.pk], 'reply_count'), {})
+        self.assertEqual(self.buffer.flush(), 0)
+
+    def test_flush_clamps_counters_at_zero(self):
+        self.add(-3)
+
+        self.buffer.flush()
+        self.assertEqual(self.get_reply_count(), 0)
+
+    def test_failed_flush_keeps_deltas_for_the_next_one(self):
+        self.add(2)
+
+        with mock.patch.object(self.buffer, '_apply', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.buffer.flush()
+
+        self.assertTrue(self.redis.exists(cache.make_key(PROCESSING_KEY)))
+        self.assertEqual(self.buffer.pending(Comment, [self.comment.pk], 'reply_count'), {self.comment.pk: 2})
+
+        self.add(1)
+        self.assertEqual(self.buffer.flush(), 2)
+        self.assertEqual(self.get_reply_count(), 3)
+        self.assertFalse(self.redis.exists(cache.make_key(PROCESSING_KEY)))
+        self.assertFalse(self.redis.exists(cache.make_key(BUFFER_KEY)))
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES,
+    PROTECTED_CACHE={'STALE_TIMEOUT': 60, 'LOCK_TIMEOUT': 10, 'WAIT_TIMEOUT': 0.2, 'BETA': 1.0},
+)
+class ProtectedCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.protected_cache = ProtectedCache()
+        self.compute = mock.Mock(return_value='fresh')
+
+    def store(self, value, expires_in, generation=None):
+        cache.set('key', {
+            'value': value,
+            'generation': generation,
+            'delta': 0.01,
+            'expires_at': time.time() + expires_in,
+        })
+
+    def test_fresh_entry_is_served_without_computing(self):
+        self.store('cached', expires_in=300)
+
+        self.assertEqual(self.protected_cache.get_or_compute('key', self.compute, timeout=300), 'cached')
+        self.compute.assert_not_called()
+
+    def test_expired_entry_is_refreshed_early(self):
+        self.store('cached', expires_in=-1)
+
+        self.assertEqual(self.protected_cache.get_or_compute('key', self.compute, timeout=300), 'fresh')
+        self.assertEqual(cache.get('key')['value'], 'fresh')
+
+    def test_should_refresh_grows_near_expiry(self):
+        envelope = {'generation': None, 'delta': 1.0, 'expires_at': time.time() + 1}
+
+        with mock.patch('utils.protected_cache.random.random', return_value=0.0):
+            self.assertFalse(self.protected_cache.should_refresh(envelope, None))
+        with mock.patch('utils.protected_cache.random.random', return_value=0.999):
+            # -ln(0.001) * delta ~ 6.9s, past the expiry 1s away.
+            self.assertTrue(self.protected_cache.should_refresh(envelope, None))
+
+    def test_bumped_generation_triggers_refresh(self):
+        self.store('cached', expires_in=300, generation=(1,))
+        cache.set('generation', 2)
+
+        value = self.protected_cache.get_or_compute('key', self.compute, timeout=300, generation_keys=['generation'])
+        self.assertEqual(value, 'fresh')
+
+    def test_stale_value_is_served_while_another_worker_holds_the_lock(self):
+        self.store('stale', expires_in=-1)
+        cache.add('key:lock', 1)
+
+        self.assertEqual(self.protected_cache.get_or_compute('key', self.compute, timeout=300), 'stale')
+        self.compute.assert_not_called()
+
+    def test_cold_key_waits_for_the_lock_holder_then_computes(self):
+        cache.add('key:lock', 1)
+
+        self.assertEqual(self.protected_cache.get_or_compute('key', self.compute, timeout=300), 'fresh')
+        self.compute.assert_called_once()
+
+    def test_stale_value_is_served_when_refresh_fails(self):
+        self.store('stale', expires_in=-1)
+        self.compute.side_effect = RuntimeError
+
+        self.assertEqual(self.protected_cache.get_or_compute('key', self.compute, timeout=300), 'stale')
+        self.assertIsNone(cache.get('key:lock'))
@@ -0,0 +1,206 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.db_router import primary_db
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRUCache:
+    """A bounded, thread-safe, per-process LRU dict whose entries expire."""
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        with self._lock:
+            self._data[key] = (time.monotonic() + timeout, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Two-tier cache for small, hot and rarely changing lookups: a per-process
+    LRU in front of the django-redis cache.
+
+    Invalidations delete the Redis copy and are broadcast over Redis pub/sub,
+    so every process evicts its local copy as well. The local timeout bounds
+    staleness if a broadcast is ever missed.
+    """
+
+    def __init__(self):
+        config = settings.TIERED_CACHE
+        self.timeout = config['TIMEOUT']
+        self.channel = config['CHANNEL']
+        self.local = LocalLRUCache(config['MAX_ENTRIES'], config['LOCAL_TIMEOUT'])
+        self.metrics = {'local_hits': 0, 'remote_hits': 0, 'misses': 0, 'invalidations': 0}
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    # region Pub/Sub
+
+    def _get_redis(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+
+        with self._listener_lock:
+            if self._listener_pid == pid:
+                return
+            # A forked worker must not trust what its parent had cached.
+            self.local.clear()
+            self._listener_pid = pid
+            thread = threading.Thread(target=self._listen, name='tiered-cache-listener', daemon=True)
+            thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published while we were disconnected is lost.
+                self.local.clear()
+                for message in pubsub.listen():
+                    self._handle_message(message)
+            except Exception as e:
+                logger.warning("Tiered cache listener disconnected: %s", e)
+                time.sleep(1)
+
+    def _handle_message(self, message):
+        try:
+            keys = json.loads(message['data'])
+        except (TypeError, ValueError):
+            return
+        for key in keys:
+            self.local.delete(key)
+
+    # endregion
+
+    def get(self, key, default=None):
+        self._ensure_listener()
+
+        value = self.local.get(key)
+        if value is not _MISSING:
+            self.metrics['local_hits'] += 1
+            return value
+
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            self.metrics['remote_hits'] += 1
+            self.local.set(key, value)
+            return value
+
+        self.metrics['misses'] += 1
+        return default
+
+    def set(self, key, value, timeout=None):
+        self._ensure_listener()
+        timeout = self.timeout if timeout is None else timeout
+        cache.set(key, value, timeout=timeout)
+        self.local.set(key, value, timeout)
+
+    def get_or_set(self, key, default, timeout=None):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = default() if callable(default) else default
+            self.set(key, value, timeout)
+        return value
+
+    def invalidate(self, *keys):
+        """
+        Drops these keys everywhere once the current transaction commits,
+        like ``protected_cache.bump_generation``: dropping them earlier lets
+        a concurrent request refill them with the rows being replaced.
+        """
+        if keys:
+            transaction.on_commit(lambda: self._invalidate(keys))
+
+    def _invalidate(self, keys):
+        for key in keys:
+            self.local.delete(key)
+        self.metrics['invalidations'] += len(keys)
+
+        try:
+            cache.delete_many(keys)
+            self._get_redis().publish(self.channel, json.dumps(keys))
+        except Exception as e:
+            logger.error("Error invalidating tiered cache keys %s: %s", keys, e)
+
+    def stats(self):
+        lookups = self.metrics['local_hits'] + self.metrics['remote_hits'] + self.metrics['misses']
+        hits = self.metrics['local_hits'] + self.metrics['remote_hits']
+        return {
+            **self.metrics,
+            'local_entries': len(self.local),
+            'hit_ratio': round(hits / lookups, 3) if lookups else 0,
+            'local_hit_ratio': round(self.metrics['local_hits'] / lookups, 3) if lookups else 0,
+        }
+
+
+tiered_cache = TieredCache()
+
+
+class TieredCacheListMixin:
+    """
+    Serves an unpaginated list endpoint from the tiered cache. Whoever
+    changes the underlying rows invalidates ``list_cache_key``.
+    """
+
+    list_cache_key = None
+
+    def list(self, request, *args, **kwargs):
+        def compute():
+            # Fill from the primary so a lagging replica never gets cached.
+            with primary_db():
+                return super(TieredCacheListMixin, self).list(request, *args, **kwargs).data
+
+        data = tiered_cache.get_or_set(self.list_cache_key, compute)
+        return Response(data, status=status.HTTP_200_OK)